@@ -0,0 +1,251 @@
+# analyzer/backends.py
+import os
+import re
+import json
+import time
+import random
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+import config
+from analyzer.cache import content_key
+from analyzer.metrics import MODEL_TOKENS
+
+
+class ReplayMissError(ValueError):
+    """Raised by the replay backend when no recording matches a request (not retryable)."""
+
+
+class ModelBackend(ABC):
+    """Interface the analyzer uses for every model call.
+
+    generate() returns the response text (None if the model returned no parts) and
+    raises google.api_core exceptions on API errors, so callers can retry/back off
+    the same way regardless of which backend is active. `source`, if given, names the
+    request's image inputs independently of how they were rendered (e.g. the PDF's
+    hash and page numbers); record/replay key on it instead of the image bytes.
+    """
+    name = "base"
+    ready = False
+
+    @abstractmethod
+    def generate(self, model_name, contents, temperature, max_output_tokens, safety_settings, timeout, source=None):
+        """Sends one request to `model_name` and returns the response text."""
+
+    def warm_up(self, model_names):
+        """Prepares clients/connections for the given models ahead of the first real call."""
+
+
+class GeminiBackend(ModelBackend):
+    """Live calls through google.generativeai.
+
+    GenerativeModel and GenerationConfig objects are built once and reused for every
+    call; all models share the SDK's process-wide client, so pages, sections and
+    concurrent requests go over the same pooled connection.
+    """
+    name = "gemini"
+
+    def __init__(self):
+        self.ready = False
+        self._models = {}
+        self._generation_configs = {}
+        self._lock = threading.Lock()
+        if not config.GOOGLE_API_KEY:
+            logging.warning("Google API key missing. Gemini features disabled.")
+            return
+        try:
+            genai.configure(api_key=config.GOOGLE_API_KEY, transport=config.LLM_TRANSPORT)
+            self.ready = True
+            logging.info("Google Generative AI client configured successfully.")
+        except Exception as e:
+            logging.error(f"Failed to configure Google Generative AI: {e}")
+
+    def _model(self, model_name):
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None: model = self._models[model_name] = genai.GenerativeModel(model_name)
+            return model
+
+    def _generation_config(self, temperature, max_output_tokens):
+        key = (temperature, max_output_tokens)
+        with self._lock:
+            generation_config = self._generation_configs.get(key)
+            if generation_config is None:
+                generation_config = self._generation_configs[key] = genai.GenerationConfig(temperature=temperature, max_output_tokens=max_output_tokens)
+            return generation_config
+
+    def warm_up(self, model_names):
+        """Builds the models and opens the shared connection with a cheap count_tokens call."""
+        if not self.ready: return
+        for model_name in model_names:
+            try:
+                start = time.perf_counter()
+                self._model(model_name).count_tokens("warm-up", request_options={'timeout': config.LLM_WARMUP_TIMEOUT})
+                logging.info(f"Warmed up {model_name} in {time.perf_counter() - start:.2f}s.")
+            except Exception as e:
+                logging.warning(f"Warm-up of {model_name} failed (first call will pay setup cost): {e}")
+
+    def generate(self, model_name, contents, temperature, max_output_tokens, safety_settings, timeout, source=None):
+        model = self._model(model_name)
+        generation_config = self._generation_config(temperature, max_output_tokens)
+        response = model.generate_content(contents=contents, generation_config=generation_config, safety_settings=safety_settings, request_options={'timeout': timeout})
+        usage = getattr(response, 'usage_metadata', None)
+        if usage:
+            MODEL_TOKENS.inc(getattr(usage, 'prompt_token_count', 0) or 0, model=model_name, direction='input')
+            MODEL_TOKENS.inc(getattr(usage, 'candidates_token_count', 0) or 0, model=model_name, direction='output')
+        if not response.parts: return None
+        return response.text
+
+
+def request_key(model_name, contents, temperature, max_output_tokens, source=None):
+    """Stable hash of a model request.
+
+    Images are included by content, unless the request names its `source`: rendered
+    and encoded bytes vary with the poppler/Pillow/libjpeg build, so a recording keyed
+    on them would not replay on another machine.
+    """
+    parts = contents if isinstance(contents, list) else [contents]
+    flat = []
+    for part in parts:
+        if isinstance(part, dict): flat.extend([part.get("mime_type", "")] + ([] if source else [part.get("data", b"")]))
+        else: flat.append(part)
+    if source: flat.append(source)
+    return content_key(model_name, temperature, max_output_tokens, *flat)
+
+
+def payload_size(contents):
+    """Bytes sent to the model for a request: UTF-8 prompt text plus raw image data."""
+    parts = contents if isinstance(contents, list) else [contents]
+    return sum(len(p.get("data", b"")) if isinstance(p, dict) else len(str(p).encode("utf-8")) for p in parts)
+
+
+def _describe(contents):
+    """Human-readable summary of a request for recording files (prompt text, image sizes)."""
+    parts = contents if isinstance(contents, list) else [contents]
+    return [f"<{p.get('mime_type')} {len(p.get('data', b''))} bytes>" if isinstance(p, dict) else p[:500] for p in parts]
+
+
+class RecordingBackend(ModelBackend):
+    """Forwards calls to a live backend and saves each request/response pair to disk."""
+    name = "record"
+
+    def __init__(self, inner, directory):
+        self.inner = inner
+        self.warm_up = inner.warm_up
+        self.directory = directory
+        self.ready = inner.ready
+        os.makedirs(directory, exist_ok=True)
+
+    def generate(self, model_name, contents, temperature, max_output_tokens, safety_settings, timeout, source=None):
+        text = self.inner.generate(model_name, contents, temperature, max_output_tokens, safety_settings, timeout)
+        key = request_key(model_name, contents, temperature, max_output_tokens, source)
+        record = {"model": model_name, "temperature": temperature, "max_output_tokens": max_output_tokens,
+                  "source": source, "request": _describe(contents), "response": text}
+        path = os.path.join(self.directory, f"{key}.json")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f: json.dump(record, f, indent=1)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Could not save recording {path}: {e}")
+        return text
+
+
+class ReplayBackend(ModelBackend):
+    """Serves recorded responses offline, with optional injected latency and errors.
+
+    Latency and error injection are driven by a seeded RNG so load tests are repeatable.
+    Injected errors are 429s (with a retry hint) and 503s, exercising the same retry
+    and rate-limit paths as the live API.
+    """
+    name = "replay"
+    ready = True
+
+    def __init__(self, directory, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.directory = directory
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        if not os.path.isdir(directory): logging.warning(f"Replay directory {directory} does not exist; every call will miss.")
+
+    def generate(self, model_name, contents, temperature, max_output_tokens, safety_settings, timeout, source=None):
+        with self._rng_lock:
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            fail_roll, kind_roll = self._rng.random(), self._rng.random()
+        time.sleep(delay)
+        if fail_roll < self.error_rate:
+            if kind_roll < 0.5: raise google_exceptions.ResourceExhausted(f"Injected rate limit. Please retry in {config.LLM_REPLAY_RETRY_AFTER}s.")
+            raise google_exceptions.ServiceUnavailable("Injected service error.")
+        key = request_key(model_name, contents, temperature, max_output_tokens, source)
+        try:
+            with open(os.path.join(self.directory, f"{key}.json"), "r", encoding="utf-8") as f: return json.load(f)["response"]
+        except FileNotFoundError:
+            prompt = next((p for p in (contents if isinstance(contents, list) else [contents]) if isinstance(p, str)), "")
+            raise ReplayMissError(f"No recording for {model_name} request {key[:12]} (source: {source or 'image bytes'}; prompt: {prompt[:80]!r})")
+
+
+class StubBackend(ModelBackend):
+    """Synthesizes well-formed responses for every pipeline prompt, without any recordings.
+
+    Used by the benchmark harness to time the pipeline itself: OCR returns text that
+    mentions a target section, section identification spreads pages across all target
+    sections, and scoring/feedback return valid JSON. Each call sleeps LLM_STUB_LATENCY.
+    """
+    name = "stub"
+    ready = True
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def generate(self, model_name, contents, temperature, max_output_tokens, safety_settings, timeout, source=None):
+        time.sleep(self.latency)
+        parts = contents if isinstance(contents, list) else [contents]
+        images = [p for p in parts if isinstance(p, dict)]
+        prompt = next((p for p in parts if isinstance(p, str)), "")
+        sections = config.TARGET_SECTIONS
+        if images:
+            texts = [f"{sections[len(p.get('data', b'')) % len(sections)]} slide. Stub OCR text for a {len(p.get('data', b''))} byte page image." for p in images]
+            if len(images) == 1: return texts[0]
+            return json.dumps({"pages": [{"image": i + 1, "text": text} for i, text in enumerate(texts)]})
+        if "Map content to sections" in prompt:
+            pages = sorted({int(n) for n in re.findall(r"--- Page (\d+) ---", prompt)}) or [1]
+            return json.dumps({section: [page for i, page in enumerate(pages) if i % len(sections) == j] or [pages[0]] for j, section in enumerate(sections)})
+        if "Synthesize core section analysis" in prompt:
+            return json.dumps({"strengths": ["Stub strength."], "weaknesses": ["Stub weakness. Suggest: stub."]})
+        named = [section for section in sections if f"**Section:** {section}" in prompt]
+        if len(named) > 1: return json.dumps({section: {"score": 70, "justification": "Stub score."} for section in named})
+        return json.dumps({"score": 70, "justification": "Stub score."})
+
+
+_shared_backend = None
+_shared_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Returns the process-wide backend for config.LLM_BACKEND, creating it on first use.
+
+    Sharing one backend lets every analyzer (request handler, job worker, batch
+    thread) reuse the same long-lived model clients.
+    """
+    global _shared_backend
+    with _shared_backend_lock:
+        if _shared_backend is None: _shared_backend = create_backend()
+        return _shared_backend
+
+
+def create_backend(name=None):
+    """Builds the backend selected by config.LLM_BACKEND ('gemini', 'record', 'replay' or 'stub')."""
+    name = name or config.LLM_BACKEND
+    if name == "gemini": return GeminiBackend()
+    if name == "record": return RecordingBackend(GeminiBackend(), config.LLM_RECORDINGS_DIR)
+    if name == "replay":
+        return ReplayBackend(config.LLM_RECORDINGS_DIR, latency=config.LLM_REPLAY_LATENCY, jitter=config.LLM_REPLAY_JITTER,
+                             error_rate=config.LLM_REPLAY_ERROR_RATE, seed=config.LLM_REPLAY_SEED)
+    if name == "stub": return StubBackend(latency=config.LLM_STUB_LATENCY)
+    raise ValueError(f"Unknown LLM backend: {name}")
@@ -0,0 +1,153 @@
+# analyzer/cache.py
+import os
+import time
+import hashlib
+import logging
+import threading
+
+import config
+
+
+def content_key(*parts):
+    """Returns a SHA-256 hex digest over the given str/bytes parts (NUL-separated)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def file_hash(path):
+    """SHA-256 hex digest of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""): digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """Content-addressed on-disk text cache with a size cap and LRU eviction.
+
+    Each entry is one file named by its key; the file's mtime is refreshed on every
+    hit so the least recently used entries are evicted first once the cache grows
+    past `max_bytes`. Safe to share between threads of one process. Several processes
+    may share a directory: the size is re-measured from disk before evicting and at
+    least every `resync_interval` seconds, so the cap holds approximately across them.
+    A failed write or eviction is logged and never raised to the caller.
+    """
+
+    resync_interval = 60
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._resync()
+
+    def _scan(self):
+        """Returns [(mtime, size, path)] for all entries, skipping any removed mid-scan (e.g. by another process)."""
+        found = []
+        try: shards = [shard.path for shard in os.scandir(self.directory) if shard.is_dir()]
+        except OSError: return found
+        for shard in shards:
+            try: entries = list(os.scandir(shard))
+            except OSError: continue
+            for entry in entries:
+                try:
+                    if not entry.is_file() or entry.name.endswith(".tmp"): continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, stat.st_size, entry.path))
+        return found
+
+    def _resync(self):
+        """Re-measures the cache size from disk (lock must be held, except in __init__)."""
+        self._size = sum(size for _, size, _ in self._scan())
+        self._synced_at = time.monotonic()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Returns the cached text for `key`, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f: value = f.read()
+            os.utime(path) # Mark as recently used
+        except FileNotFoundError:
+            with self._lock: self.misses += 1
+            return None
+        except OSError as e:
+            logging.warning(f"Cache read failed for {key}: {e}")
+            with self._lock: self.misses += 1
+            return None
+        with self._lock: self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Stores `value` under `key`, evicting least recently used entries if over the cap."""
+        path = self._path(key)
+        data = value.encode("utf-8")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f: f.write(data)
+            os.replace(tmp_path, path) # Atomic, so readers never see a partial entry
+        except OSError as e:
+            logging.warning(f"Cache write failed for {key}: {e}")
+            return
+        with self._lock:
+            self._size += len(data) - old_size
+            try:
+                if time.monotonic() - self._synced_at > self.resync_interval: self._resync()
+                if self._size > self.max_bytes: self._evict()
+            except OSError as e:
+                logging.warning(f"Cache eviction failed: {e}")
+
+    def _evict(self):
+        """Deletes oldest entries until the cache is at 90% of its cap (lock must be held)."""
+        entries = sorted(self._scan())
+        # Measure again: other processes sharing the directory add and evict entries too
+        self._size = sum(size for _, size, _ in entries); self._synced_at = time.monotonic()
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if self._size <= target: break
+            try: os.remove(path)
+            except FileNotFoundError: self._size -= size; continue # Already evicted by another process
+            except OSError: continue
+            self._size -= size; self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "bytes": self._size, "max_bytes": self.max_bytes}
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def _shared_cache(name, directory, max_bytes):
+    """Returns the process-wide DiskCache for `name`, opening it on first use (None if unavailable)."""
+    with _caches_lock:
+        if name not in _caches:
+            try: _caches[name] = DiskCache(directory, max_bytes)
+            except OSError as e: logging.error(f"Could not open {name} cache at {directory}: {e}"); return None
+        return _caches[name]
+
+
+def get_ocr_cache():
+    """Returns the process-wide OCR cache, or None if disabled/unavailable."""
+    if not config.OCR_CACHE_ENABLED: return None
+    return _shared_cache("OCR", config.OCR_CACHE_DIR, config.OCR_CACHE_MAX_BYTES)
+
+
+def get_score_cache():
+    """Returns the process-wide section score/feedback memo, or None if disabled/unavailable."""
+    if not config.SCORE_CACHE_ENABLED: return None
+    return _shared_cache("score", config.SCORE_CACHE_DIR, config.SCORE_CACHE_MAX_BYTES)
@@ -1,49 +1,75 @@
 # analyzer/core.py
 import os
-import io
 import re
 import json
 import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from PIL import Image
 
-# --- Import Google Generative AI & PDF Processing ---
-import google.generativeai as genai
+# --- Import Google API Errors & PDF Processing ---
 from google.api_core import exceptions as google_exceptions
-from pdf2image import convert_from_path
 from pdf2image.exceptions import PDFPageCountError, PDFSyntaxError
 
 # --- Import Configuration ---
 # Use relative import since config.py is one level up
 import config
+from analyzer import raster, encoding, metrics, sections
+from analyzer.backends import get_backend, payload_size
+from analyzer.timing import StageTimer
+from analyzer.cache import get_ocr_cache, get_score_cache, content_key, file_hash
+from analyzer.ratelimit import get_rate_limiter, retry_after_seconds, estimate_tokens
+
+SCORING_INSTRUCTIONS = """**Role:** Analyst. Evaluate section text based *only* on criteria. **Instructions:** Provide score (0-100) & brief justification. Format ONLY valid JSON: {"score": integer, "justification": string}."""
+SECTION_ID_PROMPT = "**Role:** Analyst. Map content to sections.\n**Instructions:** Find pages for ONLY these sections: {sections}. Output ONLY valid JSON mapping section names to page lists (e.g., [1, 2]). Omit others.\n**Example:** {{\"Problem\":[2,3],\"Team\":[10]}}\n---\n**Text:**\n{full_text}\n---\n**JSON Output:**"
+BATCH_SCORING_PROMPT = "**Role:** Analyst. Evaluate EACH section below independently, based *only* on its own criteria. **Instructions:** For every section provide score (0-100) & brief justification. Format ONLY one valid JSON object mapping each section name to {{\"score\": integer, \"justification\": string}}.\n**Example:** {example}\n---\n{blocks}**JSON Output:**"
+FEEDBACK_PROMPT = "**Role:** Analyst. Synthesize core section analysis into feedback.\n**Summary (Core Sections Only):**\n---\n{summary}---\n**Instructions:** Identify 2-3 key STRENGTHS & 2-3 critical WEAKNESSES based *primarily* on this summary. Add actionable suggestions for weaknesses. Format ONLY valid JSON: {{\"strengths\": [strings], \"weaknesses\": [strings]}}.\n**Example:** {{\"strengths\": [\"Problem clear(90)\"], \"weaknesses\": [\"Market lacks data(40). Suggest: Cite sources.\"]}}\n---\n**JSON Output:**"
 
 class PitchAnalyzer:
     """Encapsulates the pitch deck analysis logic."""
 
-    def __init__(self):
-        """Initializes the analyzer and configures Gemini."""
+    def __init__(self, backend=None):
+        """Initializes the analyzer and its model backend (config.LLM_BACKEND unless one is given)."""
         self.genai_configured = False
+        self.backend = backend
         self._configure_gemini()
         self.last_error = None
+        self.last_page_sources = []
+        self._pdf_digest = None
+        self._progress = None
+        self._on_event = None
+        self._timer = StageTimer()
+        self.last_timings = {}
+        self._reused = {'sections': [], 'feedback': False}
+        self._degraded = []
+        self._run_lock = threading.Lock() # Guards the per-run state above
         # Store config values needed within the class
         self.target_sections = config.TARGET_SECTIONS
         self.section_weights = config.SECTION_WEIGHTS
         self.scoring_criteria = config.SCORING_CRITERIA
 
     def _configure_gemini(self):
-        """Configures the Google Generative AI client."""
-        if not config.GOOGLE_API_KEY:
-            logging.warning("Google API key missing. Gemini features disabled.")
-            self.genai_configured = False
-            return
+        """Creates the model backend; the analyzer is usable only if the backend is ready."""
         try:
-            genai.configure(api_key=config.GOOGLE_API_KEY)
-            self.genai_configured = True
-            logging.info("Google Generative AI client configured successfully.")
+            if self.backend is None: self.backend = get_backend()
+            self.genai_configured = self.backend.ready
         except Exception as e:
-            logging.error(f"Failed to configure Google Generative AI: {e}")
+            logging.error(f"Failed to configure LLM backend '{config.LLM_BACKEND}': {e}")
             self.genai_configured = False
 
+    def _report_progress(self, stage, **counts):
+        """Passes per-stage progress to the callback given to analyze(), if any."""
+        if not self._progress: return
+        try: self._progress(stage, **counts)
+        except Exception as e: logging.warning(f"Progress callback failed: {e}")
+
+    def _emit(self, event, **data):
+        """Passes a partial result (section map, a section score, feedback...) to the on_event callback, if any."""
+        if not self._on_event: return
+        try: self._on_event(event, data)
+        except Exception as e: logging.warning(f"Event callback failed: {e}")
+
     # --- Internal Methods (_call_gemini_vision_ocr, _call_gemini_text, etc.) ---
     # (Copy ALL the internal methods _call_*, _extract_text, _preprocess_text,
     #  _identify_sections, _aggregate_content, _score_sections,
@@ -51,64 +77,260 @@ class PitchAnalyzer:
     #  implementation of the PitchAnalyzer class HERE)
     # --- START COPY of Internal Methods ---
 
-    def _call_gemini_vision_ocr(self, image_bytes, mime_type="image/jpeg"):
-        """Internal method to call Gemini Vision API for OCR."""
+    def _generate(self, model_name, payload, temperature, max_output_tokens, safety_settings, est_tokens, label, source=None):
+        """Internal rate-limited model call through the backend, with retries. Returns stripped text or None."""
+        limiter = get_rate_limiter(model_name)
+        payload_bytes = payload_size(payload)
+        for attempt in range(config.LLM_RETRY_ATTEMPTS):
+            waited = limiter.acquire(est_tokens)
+            if waited: metrics.BACKOFF_SECONDS.inc(waited, model=model_name, reason='rate_limiter')
+            self._timer.add('model_calls'); self._timer.add('bytes_sent', payload_bytes)
+            metrics.MODEL_PAYLOAD_BYTES.inc(payload_bytes, model=model_name)
+            if attempt: self._timer.add('model_retries'); metrics.MODEL_RETRIES.inc(model=model_name)
+            call_start = time.perf_counter(); outcome = 'error'
+            try:
+                text = self.backend.generate(model_name, payload, temperature, max_output_tokens, safety_settings, config.LLM_REQUEST_TIMEOUT, source)
+                outcome = 'ok' if text is not None else 'empty'
+                return text.strip() if text is not None else None
+            except google_exceptions.ResourceExhausted as e:
+                # 429: pause every worker sharing this model's quota, not just this one
+                outcome = 'rate_limited'
+                wait_time = retry_after_seconds(e) or config.RATE_LIMIT_BACKOFF_MULTIPLIER * (attempt + 1)
+                logging.warning(f"Gemini {label} rate limited (Attempt {attempt + 1}): {e}")
+                if attempt == config.LLM_RETRY_ATTEMPTS - 1: return None
+                limiter.pause(wait_time)
+            except google_exceptions.GoogleAPIError as e:
+                wait_time = config.LLM_RETRY_DELAY * (2 ** attempt); logging.warning(f"Gemini {label} API error (Attempt {attempt + 1}): {e}. Waiting {wait_time:.2f}s...")
+                if attempt == config.LLM_RETRY_ATTEMPTS - 1: return None
+                metrics.BACKOFF_SECONDS.inc(wait_time, model=model_name, reason='retry')
+                time.sleep(wait_time)
+            except (google_exceptions.InvalidArgument, ValueError) as e: outcome = 'non_retryable'; logging.error(f"Non-retryable Gemini {label} error: {e}"); return None
+            except Exception as e:
+                wait_time = config.LLM_RETRY_DELAY * (2 ** attempt); logging.error(f"Unexpected {label} call error: {e}")
+                metrics.BACKOFF_SECONDS.inc(wait_time, model=model_name, reason='retry')
+                time.sleep(wait_time)
+            finally:
+                metrics.MODEL_CALLS.inc(model=model_name, outcome=outcome)
+                metrics.MODEL_CALL_SECONDS.observe(time.perf_counter() - call_start, model=model_name)
+        return None
+
+    def _ocr_cache_lookup(self, image_bytes, mime_type):
+        """Internal OCR cache probe. Returns (cache_key, cached_text); both None when the cache is off."""
+        ocr_cache = get_ocr_cache()
+        if not ocr_cache: return None, None
+        # Keyed by the single-page prompt even for batched requests, so hits do not depend on batch layout
+        cache_key = content_key(config.LLM_VISION_MODEL, config.OCR_PROMPT, mime_type, image_bytes)
+        cached = ocr_cache.get(cache_key)
+        metrics.OCR_CACHE_EVENTS.inc(result='hit' if cached is not None else 'miss')
+        return cache_key, cached
+
+    def _ocr_cache_store(self, cache_key, text):
+        ocr_cache = get_ocr_cache()
+        if text and cache_key and ocr_cache: ocr_cache.put(cache_key, text) # Never cache failures
+
+    def _page_source(self, page_nums):
+        """Internal render-independent name for page images sent to the model (None if the PDF is unknown)."""
+        if not self._pdf_digest or None in page_nums: return None
+        return f"pdf:{self._pdf_digest} pages:{','.join(str(page_num) for page_num in page_nums)}"
+
+    def _call_gemini_vision_ocr(self, image_bytes, mime_type="image/jpeg", page_num=None):
+        """Internal method to call Gemini Vision API for OCR, served from the OCR cache when possible."""
         if not self.genai_configured: return None
+        cache_key, cached = self._ocr_cache_lookup(image_bytes, mime_type)
+        if cached is not None: return cached
+        text = self._request_vision_ocr(image_bytes, mime_type, page_num)
+        self._ocr_cache_store(cache_key, text)
+        return text
+
+    def _request_vision_ocr(self, image_bytes, mime_type, page_num=None):
+        """Internal single-page Vision OCR request (no cache)."""
+        prompt = config.OCR_PROMPT
         try:
-            model = genai.GenerativeModel(config.LLM_VISION_MODEL)
-            generation_config = genai.GenerationConfig(temperature=0.1, max_output_tokens=config.LLM_MAX_TOKENS_OCR)
-            prompt = "Extract all text visible in this image. Provide only the text content, maintaining layout if possible (e.g., using line breaks)."
             payload = [prompt, {"mime_type": mime_type, "data": image_bytes}]
-            for attempt in range(config.LLM_RETRY_ATTEMPTS):
-                try:
-                    response = model.generate_content(contents=payload, generation_config=generation_config, safety_settings=config.SAFETY_SETTINGS_VISION, request_options={'timeout': config.LLM_REQUEST_TIMEOUT})
-                    if not response.parts: return None
-                    return response.text.strip()
-                except google_exceptions.GoogleAPIError as e:
-                    wait_time = config.LLM_RETRY_DELAY * (2 ** attempt); logging.warning(f"Gemini Vision API error (Attempt {attempt + 1}): {e}. Waiting {wait_time:.2f}s...")
-                    if attempt == config.LLM_RETRY_ATTEMPTS - 1: return None
-                    time.sleep(wait_time)
-                except (google_exceptions.InvalidArgument, ValueError) as e: logging.error(f"Non-retryable Gemini Vision error: {e}"); return None
-                except Exception as e: logging.error(f"Unexpected Vision call error: {e}"); time.sleep(config.LLM_RETRY_DELAY * (2 ** attempt));
-            return None
+            est_tokens = estimate_tokens(prompt, images=1, max_output_tokens=config.LLM_MAX_TOKENS_OCR)
+            return self._generate(config.LLM_VISION_MODEL, payload, 0.1, config.LLM_MAX_TOKENS_OCR, config.SAFETY_SETTINGS_VISION, est_tokens, "Vision", self._page_source([page_num]))
         except Exception as model_init_error: logging.error(f"Failed to init Vision model: {model_init_error}"); return None
 
+    def _request_vision_ocr_batch(self, items):
+        """Internal multi-page Vision OCR request. `items` is [(page_num, image_bytes, mime_type)].
+
+        Returns {page_num: text} for the pages whose text could be mapped back from the
+        structured response; pages missing from it are left out. Returns None if the
+        request itself failed (after the usual retries).
+        """
+        prompt = config.OCR_BATCH_PROMPT.format(count=len(items))
+        payload = [prompt]
+        for i, (_, image_bytes, mime_type) in enumerate(items):
+            payload.extend([f"Image {i + 1}:", {"mime_type": mime_type, "data": image_bytes}])
+        max_tokens = min(config.LLM_MAX_TOKENS_OCR * len(items), config.LLM_MAX_TOKENS_OCR_BATCH)
+        try:
+            est_tokens = estimate_tokens(prompt, images=len(items), max_output_tokens=max_tokens)
+            source = self._page_source([page_num for page_num, _, _ in items])
+            response = self._generate(config.LLM_VISION_MODEL, payload, 0.1, max_tokens, config.SAFETY_SETTINGS_VISION, est_tokens, "Vision batch", source)
+        except Exception as model_init_error: logging.error(f"Failed to init Vision model: {model_init_error}"); return None
+        if response is None: return None
+        if not response: return {}
+        try: entries = self._parse_json_object(response).get('pages')
+        except Exception as e: logging.warning(f"Failed batch OCR JSON parse: {e}"); return {}
+        mapped = {}
+        for entry in entries if isinstance(entries, list) else []:
+            index = entry.get('image') if isinstance(entry, dict) else None
+            if isinstance(index, int) and 1 <= index <= len(items) and isinstance(entry.get('text'), str):
+                mapped[items[index - 1][0]] = entry['text'].strip()
+        return mapped
+
+    def _ocr_encoded_pages(self, items):
+        """Internal OCR of encoded pages [(page_num, image_bytes, mime_type)] using batched requests.
+
+        Pages the model's response cannot be mapped back to are split into halves and
+        retried, down to single-page requests. If a request fails outright (e.g. 429s or
+        outages outlasting the retries), its pages are marked failed rather than split,
+        so an outage does not multiply the calls. Returns {page_num: text or None}.
+        """
+        results, pending = {}, []
+        for page_num, image_bytes, mime_type in items:
+            cache_key, cached = self._ocr_cache_lookup(image_bytes, mime_type)
+            if cached is not None: results[page_num] = cached
+            else: pending.append((page_num, image_bytes, mime_type, cache_key))
+        if len(pending) == 1:
+            page_num, image_bytes, mime_type, cache_key = pending[0]
+            results[page_num] = self._request_vision_ocr(image_bytes, mime_type, page_num)
+            self._ocr_cache_store(cache_key, results[page_num])
+        elif pending:
+            mapped = self._request_vision_ocr_batch([item[:3] for item in pending])
+            if mapped is None:
+                logging.warning(f"Batch OCR request failed for pages {[item[0] for item in pending]}.")
+                results.update((item[0], None) for item in pending)
+                return results
+            for page_num, _, _, cache_key in pending:
+                if page_num in mapped: results[page_num] = mapped[page_num]; self._ocr_cache_store(cache_key, mapped[page_num])
+            missing = [item[:3] for item in pending if item[0] not in mapped]
+            if missing:
+                logging.warning(f"Batch OCR could not map pages {[item[0] for item in missing]}; splitting and retrying.")
+                self._timer.add('ocr_batch_splits')
+                half = (len(missing) + 1) // 2
+                for part in (missing[:half], missing[half:]):
+                    if part: results.update(self._ocr_encoded_pages(part))
+        return results
+
     def _call_gemini_text(self, prompt, max_output_tokens, temperature=config.LLM_TEMPERATURE):
         """Internal method to call Gemini Text API."""
         if not self.genai_configured: return None
         try:
-            model = genai.GenerativeModel(config.LLM_TEXT_MODEL)
-            generation_config = genai.GenerationConfig(temperature=temperature, max_output_tokens=max_output_tokens)
-            for attempt in range(config.LLM_RETRY_ATTEMPTS):
-                try:
-                    response = model.generate_content(contents=prompt, generation_config=generation_config, safety_settings=config.SAFETY_SETTINGS_TEXT, request_options={'timeout': config.LLM_REQUEST_TIMEOUT})
-                    if not response.parts: return None
-                    return response.text.strip()
-                except google_exceptions.GoogleAPIError as e:
-                    wait_time = config.LLM_RETRY_DELAY * (2 ** attempt); logging.warning(f"Gemini Text API error (Attempt {attempt + 1}): {e}. Waiting {wait_time:.2f}s...")
-                    if attempt == config.LLM_RETRY_ATTEMPTS - 1: return None
-                    time.sleep(wait_time)
-                except (google_exceptions.InvalidArgument, ValueError) as e: logging.error(f"Non-retryable Gemini Text error: {e}"); return None
-                except Exception as e: logging.error(f"Unexpected Text call error: {e}"); time.sleep(config.LLM_RETRY_DELAY * (2 ** attempt));
-            return None
+            est_tokens = estimate_tokens(prompt, max_output_tokens=max_output_tokens)
+            return self._generate(config.LLM_TEXT_MODEL, prompt, temperature, max_output_tokens, config.SAFETY_SETTINGS_TEXT, est_tokens, "Text")
         except Exception as model_init_error: logging.error(f"Failed to init Text model: {model_init_error}"); return None
 
+    def _ocr_batch(self, batch, total, on_encoded=None):
+        """Internal OCR of rendered pages [(page_num, image)] in one batched request. Returns {page_num: text}.
+
+        `on_encoded`, if given, is called once per page as soon as its pixels are freed.
+        """
+        if len(batch) == 1: return {batch[0][0]: self._ocr_page(batch[0][0], total, batch[0][1], on_encoded)}
+        logging.info(f"Processing pages {', '.join(str(page_num) for page_num, _ in batch)}/{total} as one batch...")
+        items = []
+        for page_num, image in batch:
+            with self._timer.stage('encode'):
+                image_bytes, mime_type, info = encoding.encode_page(image)
+                image.close()
+            if on_encoded: on_encoded()
+            self._timer.add('image_bytes', len(image_bytes))
+            items.append((page_num, image_bytes, mime_type))
+        if not self.genai_configured: return {page_num: "" for page_num, _ in batch}
+        with self._timer.stage('ocr'):
+            texts = self._ocr_encoded_pages(items)
+        for page_num, _ in batch:
+            if not texts.get(page_num): logging.warning(f"Failed/empty OCR for page {page_num}.")
+            if texts.get(page_num) is None: self._degraded.append(f"OCR failed for page {page_num}")
+        return {page_num: texts.get(page_num) or "" for page_num, _ in batch}
+
+    def _ocr_page(self, page_num, total, image, on_encoded=None):
+        """Internal OCR of a single rendered page. Returns the page text ('' on failure)."""
+        logging.info(f"Processing page {page_num}/{total}...")
+        with self._timer.stage('encode'):
+            image_bytes, mime_type, info = encoding.encode_page(image)
+            image.close() # Free the decoded pixels before the (slow) API call
+        if on_encoded: on_encoded()
+        logging.debug(f"Page {page_num} encoded: {info}")
+        self._timer.add('image_bytes', len(image_bytes))
+        with self._timer.stage('ocr'):
+            extracted_text = self._call_gemini_vision_ocr(image_bytes, mime_type, page_num)
+        if not extracted_text: logging.warning(f"Failed/empty OCR for page {page_num}.")
+        if extracted_text is None: self._degraded.append(f"OCR failed for page {page_num}")
+        return extracted_text if extracted_text else ""
+
     def _extract_text(self, pdf_path):
-        """Internal method for text extraction using OCR."""
-        pages_text = []; logging.info(f"Starting OCR for: {pdf_path}")
+        """Internal method for text extraction.
+
+        Pages with a usable embedded text layer are read locally; only image-only or
+        sparse pages are rendered and sent to vision OCR. Which path each page took is
+        recorded in self.last_page_sources. Rendered pages are streamed a window at a
+        time; at most RASTER_MAX_INFLIGHT_PAGES pages (plus the window being rendered)
+        are held in memory.
+        """
+        logging.info(f"Starting text extraction for: {pdf_path}")
+        self.last_page_sources = []
         try:
+            self._pdf_digest = file_hash(pdf_path) # Names page images to the model backend (see _page_source)
             poppler_path_to_use = None
             # if os.name == 'nt' and hasattr(config, 'POPPLER_PATH_WINDOWS') and os.path.exists(config.POPPLER_PATH_WINDOWS): # Check config
             #     poppler_path_to_use = config.POPPLER_PATH_WINDOWS
-            images = convert_from_path(pdf_path, dpi=200, poppler_path=poppler_path_to_use)
-            logging.info(f"Converted {len(images)} pages.")
-            for i, image in enumerate(images):
-                page_num = i + 1; logging.info(f"Processing page {page_num}/{len(images)}...")
-                img_byte_arr = io.BytesIO(); image.save(img_byte_arr, format='JPEG', quality=90)
-                extracted_text = self._call_gemini_vision_ocr(img_byte_arr.getvalue(), "image/jpeg")
-                pages_text.append(extracted_text if extracted_text else "")
-                if not extracted_text: logging.warning(f"Failed/empty OCR for page {page_num}.")
-                if page_num < len(images): logging.info(f"Waiting {config.INTER_PAGE_DELAY}s..."); time.sleep(config.INTER_PAGE_DELAY)
+            total = raster.page_count(pdf_path, poppler_path=poppler_path_to_use)
+            logging.info(f"PDF has {total} pages.")
+            pages_text = [""] * total
+            sources = ["ocr"] * total
+            if config.TEXT_LAYER_ENABLED and total:
+                with self._timer.stage('text_layer', children=True):
+                    layer = raster.extract_text_layer(pdf_path, total, poppler_path=poppler_path_to_use) or []
+                for i, text in enumerate(layer):
+                    if raster.has_usable_text(text): pages_text[i] = text.strip(); sources[i] = "text_layer"
+            self.last_page_sources = sources
+            ocr_pages = [i + 1 for i, source in enumerate(sources) if source == "ocr"]
+            logging.info(f"{total - len(ocr_pages)} pages read from text layer, {len(ocr_pages)} need OCR.")
+            pages_done = total - len(ocr_pages)
+            self._report_progress('extracting', pages_total=total, pages_done=pages_done)
+            if not ocr_pages: return pages_text
+            done_lock = threading.Lock()
+
+            max_inflight = max(1, config.RASTER_MAX_INFLIGHT_PAGES)
+            batch_size = max(1, config.OCR_BATCH_SIZE)
+            if batch_size > max_inflight:
+                logging.warning(f"OCR_BATCH_SIZE {batch_size} exceeds RASTER_MAX_INFLIGHT_PAGES {max_inflight}; using batches of {max_inflight}.")
+                batch_size = max_inflight
+            workers = max(1, min(config.OCR_CONCURRENCY, -(-len(ocr_pages) // batch_size)))
+            # Without a rate limiter, sequential mode falls back to the fixed inter-page delay
+            delay = config.INTER_PAGE_DELAY if workers == 1 and not get_rate_limiter(config.LLM_VISION_MODEL).enabled else 0
+            # One slot per decoded page; freed once the page is encoded, so slow API calls do not hold them
+            slots = threading.BoundedSemaphore(max_inflight)
+
+            def ocr_and_release(batch):
+                released = 0
+                def release_page():
+                    nonlocal released
+                    released += 1; slots.release()
+                try:
+                    for page_num, text in self._ocr_batch(batch, total, on_encoded=release_page).items(): pages_text[page_num - 1] = text
+                    nonlocal pages_done
+                    with done_lock: pages_done += len(batch); done = pages_done
+                    self._report_progress('extracting', pages_total=total, pages_done=done)
+                    if delay and batch[-1][0] < ocr_pages[-1]: logging.info(f"Waiting {delay}s..."); time.sleep(delay)
+                finally:
+                    for _ in range(len(batch) - released): slots.release()
+
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr") as pool:
+                futures, batch = [], []
+                pages = raster.iter_page_images(pdf_path, ocr_pages, poppler_path=poppler_path_to_use)
+                while True:
+                    slots.acquire() # Wait for a free slot before rendering/pulling the next page
+                    with self._timer.stage('rasterize', children=True): item = next(pages, None)
+                    if item is None: slots.release()
+                    else: batch.append(item)
+                    if batch and (item is None or len(batch) == batch_size):
+                        futures.append(pool.submit(ocr_and_release, batch)); batch = []
+                    if item is None: break
+                for future in futures: future.result() # Re-raise any worker error
+            ocr_cache = get_ocr_cache()
+            if ocr_cache: logging.info(f"OCR cache: {ocr_cache.stats()}")
             return pages_text
         except (ImportError, FileNotFoundError, PDFPageCountError, PDFSyntaxError, Exception) as e:
              logging.error(f"Error during text extraction: {e}", exc_info=True)
@@ -121,15 +343,51 @@ class PitchAnalyzer:
         text = text.lower(); text = re.sub(r'\s+', ' ', text).strip(); return text
 
     def _identify_sections(self, pages_text):
-        """Internal method for section identification."""
+        """Internal method for section identification.
+
+        config.SECTION_ID_MODE: 'llm' sends every page to the text model (original
+        behaviour); 'hybrid' classifies pages locally and asks the model only about pages
+        the classifier is unsure of (including, with SECTION_ID_ASK_UNMATCHED, pages with
+        no keyword hits); 'local' never calls the model and leaves such pages unassigned.
+        """
         logging.info(f"Identifying target sections: {', '.join(self.target_sections)}")
         if not pages_text or not any(pages_text): return {}
+        if config.SECTION_ID_MODE == 'llm': return self._identify_sections_llm(pages_text, range(len(pages_text)))
+
+        local_map, uncertain, guesses = sections.get_classifier().classify(pages_text)
+        logging.info(f"Local classifier: {sum(len(p) for p in local_map.values())} assignments, {len(uncertain)} uncertain pages.")
+        fallback = {}
+        for idx, section in guesses.items(): fallback.setdefault(section, []).append(idx)
+        if config.SECTION_ID_MODE == 'hybrid' and config.SECTION_ID_ASK_UNMATCHED:
+            # No keyword hits is no evidence at all, so these pages are the least certain ones
+            assigned = {idx for pages in local_map.values() for idx in pages} | set(uncertain)
+            unmatched = [idx for idx, text in enumerate(pages_text) if idx not in assigned and text.strip()]
+            if unmatched: logging.info(f"{len(unmatched)} pages without keyword hits also go to the LLM.")
+            uncertain = sorted(uncertain + unmatched)
+        if not uncertain or config.SECTION_ID_MODE == 'local':
+            validated = sections.merge_section_maps(local_map, fallback)
+        else:
+            llm_map = self._identify_sections_llm(pages_text, uncertain)
+            if llm_map is None:
+                # The confident local assignments are still usable; do not fail the analysis
+                logging.warning("LLM section identification failed; using classifier guesses for uncertain pages.")
+                self.last_error = None
+                self._degraded.append("Section identification fell back to classifier guesses")
+                llm_map = fallback
+            validated = sections.merge_section_maps(local_map, llm_map)
+        logging.info(f"Validated section map: {validated}")
+        return validated
+
+    def _identify_sections_llm(self, pages_text, page_indices):
+        """Internal LLM section identification over the given 0-based pages."""
+        page_indices = list(page_indices)
         formatted_pages = []; max_len = 400
-        for i, text in enumerate(pages_text):
+        for i in page_indices:
+             text = pages_text[i]
              processed = text[:max_len//2] + "..." + text[-max_len//2:] if len(text) > max_len else text
              formatted_pages.append(f"--- Page {i + 1} ---\n{processed}\n")
         full_text = "\n".join(formatted_pages)
-        prompt = f"**Role:** Analyst. Map content to sections.\n**Instructions:** Find pages for ONLY these sections: {', '.join(self.target_sections)}. Output ONLY valid JSON mapping section names to page lists (e.g., [1, 2]). Omit others.\n**Example:** {{\"Problem\":[2,3],\"Team\":[10]}}\n---\n**Text:**\n{full_text}\n---\n**JSON Output:**"
+        prompt = SECTION_ID_PROMPT.format(sections=', '.join(self.target_sections), full_text=full_text)
         response = self._call_gemini_text(prompt, config.LLM_MAX_TOKENS_SECTION_ID)
         if not response: return None
 
@@ -138,12 +396,13 @@ class PitchAnalyzer:
             if not json_match: raise json.JSONDecodeError("No JSON found", response, 0)
             json_string = json_match.group(1) if len(json_match.groups()) == 1 else json_match.group(0)
             raw_map = json.loads(json_string)
+            allowed = set(page_indices)
             validated = {}
             for section, pages in raw_map.items():
                 if section in self.target_sections and isinstance(pages, list):
-                    valid_p = sorted(list(set(p - 1 for p in pages if isinstance(p, int) and 0 < p <= len(pages_text))))
+                    valid_p = sorted(list(set(p - 1 for p in pages if isinstance(p, int) and (p - 1) in allowed)))
                     if valid_p: validated[section] = valid_p
-            logging.info(f"Validated section map: {validated}")
+            logging.info(f"LLM section map: {validated}")
             return validated
         except (json.JSONDecodeError, Exception) as e:
              logging.error(f"Failed parsing section ID JSON: {e}. Response: {response}")
@@ -159,27 +418,113 @@ class PitchAnalyzer:
             section_content[section] = self._preprocess_text(content)
         return section_content
 
+    def _memo_get(self, kind, key):
+        """Internal score-memo probe. Returns the memoized JSON value, or None on a miss or when the memo is off."""
+        score_cache = get_score_cache()
+        if not score_cache: return None
+        cached = score_cache.get(key)
+        metrics.SCORE_CACHE_EVENTS.inc(kind=kind, result='hit' if cached is not None else 'miss')
+        if cached is None: return None
+        try: return json.loads(cached)
+        except ValueError: logging.warning(f"Ignoring corrupt {kind} memo entry {key}"); return None
+
+    def _memo_put(self, key, value):
+        score_cache = get_score_cache()
+        if score_cache: score_cache.put(key, json.dumps(value))
+
+    def _score_key(self, section, text):
+        """Internal memo key for a section score: model, instructions, criteria and the text the model sees."""
+        # Independent of SCORING_MODE, so batched and per-section scores are interchangeable
+        return content_key(config.LLM_TEXT_MODEL, config.LLM_TEMPERATURE, SCORING_INSTRUCTIONS, section, self.scoring_criteria[section], text[:4000])
+
+    def _parse_json_object(self, response):
+        """Internal helper: pulls the first JSON object out of an LLM response (raises on failure)."""
+        json_match = re.search(r'```json\s*(\{.*?\})\s*```', response, re.DOTALL | re.IGNORECASE) or re.search(r'\{.*\}', response, re.DOTALL)
+        if not json_match: raise json.JSONDecodeError("No JSON found", response, 0)
+        return json.loads(json_match.group(1) if len(json_match.groups()) == 1 else json_match.group(0))
+
+    def _valid_score(self, score_data):
+        """Internal check that a parsed score has an int 0-100 score and a string justification."""
+        return isinstance(score_data, dict) and isinstance(score_data.get('score'), int) and 0 <= score_data['score'] <= 100 and isinstance(score_data.get('justification'), str)
+
+    def _score_section(self, section, text):
+        """Internal scoring of a single section with its own LLM call."""
+        logging.info(f"Scoring section: {section}")
+        prompt = f"{SCORING_INSTRUCTIONS}\n---\n**Section:** {section}\n**Criteria:**\n{self.scoring_criteria[section]}\n---\n**Text:**\n{text[:4000]}\n---\n**JSON Output:**"
+        response = self._call_gemini_text(prompt, config.LLM_MAX_TOKENS_SCORING)
+        if not response: self._degraded.append(f"Scoring failed for {section}"); return {"score": 0, "justification": "LLM call failed during scoring."}
+        try:
+            score_data = self._parse_json_object(response)
+            if self._valid_score(score_data): self._memo_put(self._score_key(section, text), score_data); return score_data
+            self._degraded.append(f"Scoring failed for {section}")
+            return {"score": 0, "justification": "Failed parsing score (invalid format/values)."}
+        except Exception as e:
+            logging.warning(f"Failed scoring JSON parse for '{section}': {e}. Resp: {response}")
+            self._degraded.append(f"Scoring failed for {section}"); return {"score": 0, "justification": "Failed parsing score."}
+
+    def _score_sections_batched(self, section_content):
+        """Internal scoring of all sections in one LLM call. Returns {section: score} for sections that validated."""
+        logging.info(f"Batch scoring sections: {', '.join(section_content)}")
+        blocks = "".join(f"**Section:** {section}\n**Criteria:**\n{self.scoring_criteria[section]}\n**Text:**\n{text[:4000]}\n---\n" for section, text in section_content.items())
+        example = json.dumps({section: {"score": 0, "justification": "..."} for section in section_content})
+        prompt = BATCH_SCORING_PROMPT.format(example=example, blocks=blocks)
+        response = self._call_gemini_text(prompt, config.LLM_MAX_TOKENS_SCORING * len(section_content))
+        if not response: return {}
+        try: raw_scores = self._parse_json_object(response)
+        except Exception as e: logging.warning(f"Failed batch scoring JSON parse: {e}. Resp: {response}"); return {}
+        scores = {section: raw_scores[section] for section in section_content if self._valid_score(raw_scores.get(section))}
+        for section, score_data in scores.items(): self._memo_put(self._score_key(section, section_content[section]), score_data)
+        return scores
+
     def _score_sections(self, section_content):
-        """Internal section scoring."""
+        """Internal section scoring.
+
+        config.SCORING_MODE selects how sections are sent to the model: 'serial' (one call
+        after another), 'parallel' (one call per section, run concurrently) or 'batch'
+        (all sections in one call, with per-section calls only for sections whose
+        batched score fails validation). Sections whose text, criteria and model are
+        unchanged since an earlier analysis reuse the memoized score (SCORE_CACHE_ENABLED).
+        """
         section_scores = {};
         if not section_content: return {}
-        instructions = """**Role:** Analyst. Evaluate section text based *only* on criteria. **Instructions:** Provide score (0-100) & brief justification. Format ONLY valid JSON: {"score": integer, "justification": string}."""
+        to_score = {}
         for section, text in section_content.items():
             if section in self.scoring_criteria:
-                logging.info(f"Scoring section: {section}")
-                if not text or len(text.strip()) < 20: section_scores[section] = {"score": 0, "justification": "Content missing/brief."}; continue
-                prompt = f"{instructions}\n---\n**Section:** {section}\n**Criteria:**\n{self.scoring_criteria[section]}\n---\n**Text:**\n{text[:4000]}\n---\n**JSON Output:**"
-                response = self._call_gemini_text(prompt, config.LLM_MAX_TOKENS_SCORING)
-                if response:
-                     try:
-                        json_match = re.search(r'```json\s*(\{.*?\})\s*```', response, re.DOTALL | re.IGNORECASE) or re.search(r'\{.*\}', response, re.DOTALL)
-                        if not json_match: raise json.JSONDecodeError("No JSON found", response, 0)
-                        score_data = json.loads(json_match.group(1) if len(json_match.groups()) == 1 else json_match.group(0))
-                        if isinstance(score_data.get('score'), int) and 0 <= score_data['score'] <= 100 and isinstance(score_data.get('justification'), str): section_scores[section] = score_data
-                        else: section_scores[section] = {"score": 0, "justification": "Failed parsing score (invalid format/values)."}
-                     except Exception as e: logging.warning(f"Failed scoring JSON parse for '{section}': {e}. Resp: {response}"); section_scores[section] = {"score": 0, "justification": "Failed parsing score."}
-                else: section_scores[section] = {"score": 0, "justification": "LLM call failed during scoring."}
-        return section_scores
+                if not text or len(text.strip()) < 20: section_scores[section] = {"score": 0, "justification": "Content missing/brief."}
+                else: to_score[section] = text
+        for section in list(to_score):
+            memo = self._memo_get('score', self._score_key(section, to_score[section]))
+            if self._valid_score(memo): section_scores[section] = memo; self._reused['sections'].append(section); del to_score[section]
+        if self._reused['sections']:
+            logging.info(f"Reusing memoized scores for: {', '.join(self._reused['sections'])}")
+            self._timer.add('sections_reused', len(self._reused['sections']))
+        sections_total = len(section_scores) + len(to_score)
+        reported = set()
+        def report():
+            for section in [s for s in section_scores if s not in reported]:
+                reported.add(section); self._emit('section_score', section=section, **section_scores[section])
+            self._report_progress('scoring', sections_total=sections_total, sections_scored=len(section_scores))
+        report()
+
+        if to_score and config.SCORING_MODE == 'batch' and len(to_score) > 1:
+            batched = self._score_sections_batched(to_score)
+            section_scores.update(batched)
+            for section in batched: del to_score[section]
+            if to_score: logging.warning(f"Batch scoring fell back to per-section calls for: {', '.join(to_score)}")
+            report()
+
+        if to_score and config.SCORING_MODE in ('parallel', 'batch') and len(to_score) > 1:
+            with ThreadPoolExecutor(max_workers=min(config.SCORING_WORKERS, len(to_score)), thread_name_prefix="score") as pool:
+                futures = {pool.submit(self._score_section, section, text): section for section, text in to_score.items()}
+                for future in as_completed(futures):
+                    section_scores[futures[future]] = future.result()
+                    report()
+        else:
+            for section, text in to_score.items():
+                section_scores[section] = self._score_section(section, text)
+                report()
+        # Keep the original section order regardless of completion order
+        return {section: section_scores[section] for section in section_content if section in section_scores}
 
     def _calculate_score(self, section_scores):
         """Internal overall score calculation."""
@@ -202,52 +547,105 @@ class PitchAnalyzer:
             else: summary += f"Section: {section}\nScore: Not Found\n---\n"
         if not found: return {"strengths": ["Analysis incomplete."], "weaknesses": []}
 
-        prompt = f"**Role:** Analyst. Synthesize core section analysis into feedback.\n**Summary (Core Sections Only):**\n---\n{summary}---\n**Instructions:** Identify 2-3 key STRENGTHS & 2-3 critical WEAKNESSES based *primarily* on this summary. Add actionable suggestions for weaknesses. Format ONLY valid JSON: {{\"strengths\": [strings], \"weaknesses\": [strings]}}.\n**Example:** {{\"strengths\": [\"Problem clear(90)\"], \"weaknesses\": [\"Market lacks data(40). Suggest: Cite sources.\"]}}\n---\n**JSON Output:**"
+        prompt = FEEDBACK_PROMPT.format(summary=summary)
+        # Unchanged scores and justifications give an identical prompt, so revisions with no moved scores skip the call
+        memo_key = content_key(config.LLM_TEXT_MODEL, config.LLM_TEMPERATURE, prompt)
+        memo = self._memo_get('feedback', memo_key)
+        if isinstance(memo, dict) and isinstance(memo.get('strengths'), list) and isinstance(memo.get('weaknesses'), list):
+            logging.info("Reusing memoized feedback (section scores unchanged)."); self._reused['feedback'] = True; return memo
         response = self._call_gemini_text(prompt, config.LLM_MAX_TOKENS_FEEDBACK)
-        if not response: return {"strengths": ["Feedback LLM call failed."], "weaknesses": []}
+        if not response: self._degraded.append("Feedback generation failed"); return {"strengths": ["Feedback LLM call failed."], "weaknesses": []}
         try:
             json_match = re.search(r'```json\s*(\{.*?\})\s*```', response, re.DOTALL | re.IGNORECASE) or re.search(r'\{.*\}', response, re.DOTALL)
             if not json_match: raise json.JSONDecodeError("No JSON found", response, 0)
             feedback_data = json.loads(json_match.group(1) if len(json_match.groups()) == 1 else json_match.group(0))
-            if isinstance(feedback_data.get('strengths'), list) and isinstance(feedback_data.get('weaknesses'), list): return feedback_data
-            else: return {"strengths": ["Failed parsing feedback (invalid format)."], "weaknesses": []}
-        except Exception as e: logging.error(f"Failed feedback JSON parse: {e}. Resp: {response}"); return {"strengths": ["Failed parsing feedback."], "weaknesses": []}
+            if isinstance(feedback_data.get('strengths'), list) and isinstance(feedback_data.get('weaknesses'), list): self._memo_put(memo_key, feedback_data); return feedback_data
+            else: self._degraded.append("Feedback generation failed"); return {"strengths": ["Failed parsing feedback (invalid format)."], "weaknesses": []}
+        except Exception as e:
+            logging.error(f"Failed feedback JSON parse: {e}. Resp: {response}")
+            self._degraded.append("Feedback generation failed"); return {"strengths": ["Failed parsing feedback."], "weaknesses": []}
 
     # --- END COPY of Internal Methods ---
 
-    def analyze(self, pdf_path):
-        """Public method to run the full analysis pipeline."""
-        self.last_error = None # Reset last error
-        results = {'overall_score': 0, 'section_scores': {}, 'feedback': {}, 'error': None}
-        start_time = time.time()
-        logging.info(f"--- Starting Analysis via OOP for: {pdf_path} ---")
+    def analyze(self, pdf_path, progress=None, on_event=None):
+        """Public method to run the full analysis pipeline.
+
+        `progress`, if given, is called as progress(stage, **counts) as work completes,
+        e.g. ('extracting', pages_total=.., pages_done=..) or ('scoring', sections_total=.., sections_scored=..).
+        Per-stage wall/CPU times and model payload counters are returned in results['timings'].
+        results['fingerprints'] holds short content hashes of every page and aggregated
+        section, and results['reused'] the sections (and feedback) served from the score
+        memo, so revisions of a deck can be compared and their savings seen.
+        results['degraded'] lists the model calls that failed without failing the analysis
+        (a page's OCR, a section's score, the feedback...); such results are not stored.
+        `on_event`, if given, is called as on_event(name, data) with partial results as
+        soon as they exist: 'sections' (section -> 1-based pages), 'section_score'
+        (one per section), 'overall_score' and 'feedback'.
+        Run state lives on the instance, so one instance runs one analysis at a time;
+        concurrent callers should each use their own PitchAnalyzer.
+        """
+        with self._run_lock:
+            self.last_error = None # Reset last error
+            self._progress = progress
+            self._on_event = on_event
+            self._timer = StageTimer()
+            self._reused = {'sections': [], 'feedback': False}
+            self._degraded = []
+            results = {'overall_score': 0, 'section_scores': {}, 'feedback': {}, 'page_sources': [], 'fingerprints': {}, 'reused': self._reused, 'degraded': self._degraded, 'timings': {}, 'error': None}
+            start_time = time.time()
+            logging.info(f"--- Starting Analysis via OOP for: {pdf_path} ---")
+            metrics.ANALYSES_IN_FLIGHT.inc()
+            try:
+                with self._timer.stage('total'):
+                    self._run_pipeline(pdf_path, results)
+            finally:
+                metrics.ANALYSES_IN_FLIGHT.dec()
+            metrics.ANALYSES.inc(outcome='error' if results['error'] else 'ok')
+            results['timings'] = self.last_timings = self._timer.snapshot()
+            stage_summary = ", ".join(f"{name} {t['wall_s']:.2f}s" for name, t in results['timings']['stages'].items() if name != 'total')
+            logging.info(f"--- Analysis via OOP Completed in {time.time() - start_time:.2f}s ({stage_summary}) ---")
+            return results
 
+    def _run_pipeline(self, pdf_path, results):
+        """Internal pipeline steps; fills `results` in place and stops at the first fatal error."""
         if not self.genai_configured:
-             results['error'] = "Gemini client not configured. Check API Key."
-             logging.error(results['error']); return results
+             results['error'] = "Gemini client not configured. Check API Key (or LLM_BACKEND)."
+             logging.error(results['error']); return
 
         # Step 1: Extract Text
-        pages_text = self._extract_text(pdf_path)
-        if pages_text is None: results['error'] = self.last_error or "Text extraction failed."; logging.error(results['error']); return results
-        if not any(pg.strip() for pg in pages_text): results['error'] = "No text content extracted from PDF."; logging.error(results['error']); return results
+        with self._timer.stage('extract_text'):
+            pages_text = self._extract_text(pdf_path)
+        results['page_sources'] = self.last_page_sources
+        if pages_text is None: results['error'] = self.last_error or "Text extraction failed."; logging.error(results['error']); return
+        if not any(pg.strip() for pg in pages_text): results['error'] = "No text content extracted from PDF."; logging.error(results['error']); return
+        results['fingerprints']['pages'] = [content_key(text)[:16] for text in pages_text]
 
         # Step 2: Identify Sections
-        section_map = self._identify_sections(pages_text)
-        if section_map is None: results['error'] = self.last_error or "Section identification failed."; logging.error(results['error']); return results
+        self._report_progress('identifying_sections')
+        with self._timer.stage('identify_sections'):
+            section_map = self._identify_sections(pages_text)
+        if section_map is None: results['error'] = self.last_error or "Section identification failed."; logging.error(results['error']); return
         if not section_map: logging.warning("Could not identify any target sections.")
+        self._emit('sections', sections={section: [idx + 1 for idx in pages] for section, pages in section_map.items()})
 
         # Step 3: Aggregate Content
-        section_content = self._aggregate_content(pages_text, section_map)
+        with self._timer.stage('aggregate'):
+            section_content = self._aggregate_content(pages_text, section_map)
+        results['fingerprints']['sections'] = {section: content_key(section, text)[:16] for section, text in section_content.items()}
 
         # Step 4: Score Sections
-        section_scores = self._score_sections(section_content)
+        with self._timer.stage('scoring'):
+            section_scores = self._score_sections(section_content)
         results['section_scores'] = section_scores
 
         # Step 5: Calculate Score
         results['overall_score'] = self._calculate_score(section_scores)
+        self._emit('overall_score', overall_score=results['overall_score'])
 
         # Step 6: Generate Feedback
-        results['feedback'] = self._generate_feedback(section_scores)
+        self._report_progress('feedback')
+        with self._timer.stage('feedback'):
+            results['feedback'] = self._generate_feedback(section_scores)
+        self._emit('feedback', **results['feedback'])
 
-        logging.info(f"--- Analysis via OOP Completed in {time.time() - start_time:.2f}s ---")
-        return results
\ No newline at end of file
+        self._report_progress('done')
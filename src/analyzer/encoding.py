@@ -0,0 +1,69 @@
+# analyzer/encoding.py
+import io
+import re
+import difflib
+
+from PIL import Image, ImageChops, ImageStat
+
+import config
+
+
+def encode_legacy(image):
+    """The original encoding: full-size RGB JPEG at quality 90."""
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue(), "image/jpeg", {"mode": "RGB", "size": image.size, "quality": 90, "cropped": False, "bytes": buffer.tell()}
+
+
+def _crop_margins(image):
+    """Crops uniform borders (matched against the top-left pixel colour), keeping a small margin."""
+    rgb = image.convert("RGB")
+    background = Image.new("RGB", rgb.size, rgb.getpixel((0, 0)))
+    # Small tolerance so JPEG-ish noise in the border does not defeat the crop
+    diff = ImageChops.difference(rgb, background).convert("L").point(lambda v: 255 if v > 16 else 0)
+    bbox = diff.getbbox()
+    if not bbox: return image, False
+    pad = config.ENCODE_CROP_PADDING
+    bbox = (max(0, bbox[0] - pad), max(0, bbox[1] - pad), min(image.width, bbox[2] + pad), min(image.height, bbox[3] + pad))
+    kept = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1]) / float(image.width * image.height)
+    if kept > 0.9: return image, False # Not worth it
+    return image.crop(bbox), True
+
+
+def _is_grayscale(image):
+    """True if the page has so little colour that grayscale loses nothing for OCR."""
+    thumb = image.convert("RGB")
+    thumb.thumbnail((256, 256))
+    saturation = ImageStat.Stat(thumb.convert("HSV").split()[1]).mean[0]
+    return saturation < config.ENCODE_GRAYSCALE_MAX_SATURATION
+
+
+def encode_page(image):
+    """Encodes a rendered page for vision OCR within config.ENCODE_MAX_BYTES.
+
+    Crops blank margins, switches near-colourless slides to grayscale, caps the long
+    edge at ENCODE_MAX_LONG_EDGE, then lowers JPEG quality (down to ENCODE_MIN_QUALITY)
+    and finally the resolution until the page fits the byte budget.
+    Returns (bytes, mime_type, info).
+    """
+    if config.ENCODING_MODE != "adaptive": return encode_legacy(image)
+    page, cropped = _crop_margins(image) if config.ENCODE_CROP_MARGINS else (image, False)
+    mode = "L" if _is_grayscale(page) else "RGB"
+    page = page.convert(mode)
+    scale = min(1.0, config.ENCODE_MAX_LONG_EDGE / float(max(page.size)))
+    while True:
+        sized = page.resize((max(1, round(page.width * scale)), max(1, round(page.height * scale))), Image.LANCZOS) if scale < 1.0 else page
+        for quality in range(config.ENCODE_QUALITY, config.ENCODE_MIN_QUALITY - 1, -10):
+            buffer = io.BytesIO()
+            sized.save(buffer, format="JPEG", quality=quality, optimize=True)
+            if buffer.tell() <= config.ENCODE_MAX_BYTES: break
+        # Stop shrinking once text would become too small to read reliably
+        if buffer.tell() <= config.ENCODE_MAX_BYTES or max(sized.size) * 0.8 < config.ENCODE_MIN_LONG_EDGE: break
+        scale *= 0.8
+    return buffer.getvalue(), "image/jpeg", {"mode": mode, "size": sized.size, "quality": quality, "cropped": cropped, "bytes": buffer.tell()}
+
+
+def text_similarity(reference, candidate):
+    """Word-level similarity (0-1) between two OCR outputs, ignoring case, punctuation and layout."""
+    words = lambda text: re.findall(r"\w+", (text or "").lower())
+    return difflib.SequenceMatcher(None, words(reference), words(candidate), autojunk=False).ratio()
@@ -0,0 +1,173 @@
+# analyzer/jobs.py
+import os
+import time
+import uuid
+import queue
+import logging
+import threading
+
+import config
+from analyzer.core import PitchAnalyzer
+from analyzer.metrics import JOBS_IN_FLIGHT
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the job queue is at capacity."""
+
+
+class JobManager:
+    """Runs PitchAnalyzer.analyze() jobs on a bounded pool of background worker threads.
+
+    Each worker owns its own PitchAnalyzer, since the analyzer keeps per-run state
+    (last_error, page sources, progress callback) on the instance. Finished jobs are
+    kept for JOB_RESULT_TTL seconds so clients can poll for the result. With a result
+    `store`, decks analyzed before are served from it and identical concurrent jobs
+    share one analysis. Each job also keeps an ordered event log (progress and partial
+    results as they are produced) that iter_events() follows for streaming clients.
+    """
+
+    def __init__(self, workers=None, max_queue=None, store=None):
+        self.workers = workers or config.JOB_WORKERS
+        self.store = store
+        self._queue = queue.Queue(maxsize=max_queue if max_queue is not None else config.JOB_QUEUE_MAX)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock) # Notified whenever a job gains events or finishes
+        self._threads = []
+
+    def _ensure_workers(self):
+        """Starts the worker threads on first use (lock must be held)."""
+        if self._threads: return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"analysis-worker-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logging.info(f"Started {self.workers} analysis worker(s).")
+
+    def submit(self, pdf_path, filename):
+        """Queues an analysis of `pdf_path` (deleted when the job finishes). Returns the job id."""
+        job_id = uuid.uuid4().hex
+        job = {'id': job_id, 'filename': filename, 'pdf_path': pdf_path, 'status': 'queued', 'stage': None,
+               'progress': {'pages_total': 0, 'pages_done': 0, 'sections_total': 0, 'sections_scored': 0},
+               'created_at': time.time(), 'started_at': None, 'finished_at': None, 'error': None, 'results': None, 'events': []}
+        with self._lock:
+            self._prune()
+            self._ensure_workers()
+            self._jobs[job_id] = job
+        try:
+            self._queue.put_nowait(job_id)
+        except queue.Full:
+            with self._lock: del self._jobs[job_id]
+            raise QueueFullError(f"Analysis queue is full ({self._queue.maxsize} jobs waiting).")
+        logging.info(f"Queued job {job_id} for {filename}.")
+        return job_id
+
+    def get(self, job_id):
+        """Returns a snapshot of the job (without the upload path and event log), or None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None: return None
+            snapshot = {k: v for k, v in job.items() if k not in ('pdf_path', 'events')}
+            snapshot['progress'] = dict(job['progress'])
+            snapshot['queue_position'] = self._queue_position(job_id) if job['status'] == 'queued' else 0
+            return snapshot
+
+    def _queue_position(self, job_id):
+        with self._queue.mutex: pending = list(self._queue.queue)
+        return pending.index(job_id) + 1 if job_id in pending else 0
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _prune(self):
+        """Drops finished jobs older than JOB_RESULT_TTL (lock must be held)."""
+        cutoff = time.time() - config.JOB_RESULT_TTL
+        expired = [job_id for job_id, job in self._jobs.items() if job['finished_at'] and job['finished_at'] < cutoff]
+        for job_id in expired: del self._jobs[job_id]
+
+    def iter_events(self, job_id, start=0, heartbeat=None):
+        """Yields (index, name, data) for the job's events from `start` on, until the job has finished.
+
+        Blocks while the job is busy; yields None after `heartbeat` seconds without news
+        so callers can keep a connection alive. Stops at once for unknown jobs.
+        """
+        index = start
+        while True:
+            with self._changed:
+                job = self._jobs.get(job_id)
+                if job is None: return
+                if index >= len(job['events']) and not job['finished_at']: self._changed.wait(heartbeat)
+                new, finished = job['events'][index:], job['finished_at'] is not None
+            if not new:
+                if finished: return
+                yield None; continue
+            for offset, (name, data) in enumerate(new): yield index + offset, name, data
+            index += len(new)
+
+    def _update(self, job_id, **fields):
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if not job: return
+            job.update(fields)
+            if 'finished_at' in fields:
+                job['events'].append(('done', {'status': job['status'], 'error': job['error'], 'overall_score': (job['results'] or {}).get('overall_score')}))
+            self._changed.notify_all()
+
+    def _add_events(self, job_id, events):
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if not job: return
+            job['events'].extend(events)
+            self._changed.notify_all()
+
+    def _progress_callback(self, job_id):
+        def report(stage, **counts):
+            with self._changed:
+                job = self._jobs.get(job_id)
+                if not job: return
+                job['stage'] = stage
+                job['progress'].update(counts)
+                job['events'].append(('progress', dict(job['progress'], stage=stage)))
+                self._changed.notify_all()
+        return report
+
+    def _event_callback(self, job_id):
+        return lambda name, data: self._add_events(job_id, [(name, data)])
+
+    def _replay_events(self, job_id, results):
+        """Adds the partial-result events of a result that did not come from a live run (stored or coalesced)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or any(name == 'feedback' for name, _ in job['events']): return
+        events = [('section_score', dict(data, section=section)) for section, data in results.get('section_scores', {}).items()]
+        events += [('overall_score', {'overall_score': results.get('overall_score')}), ('feedback', dict(results.get('feedback') or {}))]
+        self._add_events(job_id, events)
+
+    def _worker(self):
+        analyzer = PitchAnalyzer()
+        while True:
+            job_id = self._queue.get()
+            try:
+                with self._lock: job = dict(self._jobs[job_id]) if job_id in self._jobs else None
+                if job: self._run(analyzer, job_id, job['pdf_path'], job['filename'])
+            finally:
+                self._queue.task_done()
+
+    def _run(self, analyzer, job_id, pdf_path, filename):
+        self._update(job_id, status='running', started_at=time.time())
+        JOBS_IN_FLIGHT.inc()
+        try:
+            run = lambda path: analyzer.analyze(path, progress=self._progress_callback(job_id), on_event=self._event_callback(job_id))
+            results = self.store.analyze(pdf_path, filename, run) if self.store else run(pdf_path)
+            status = 'failed' if results.get('error') else 'done'
+            if status == 'done': self._replay_events(job_id, results)
+            self._update(job_id, status=status, results=results, error=results.get('error'), finished_at=time.time())
+        except Exception as e:
+            logging.error(f"Job {job_id} crashed: {e}", exc_info=True)
+            self._update(job_id, status='failed', error=f"Unexpected error: {e}", finished_at=time.time())
+        finally:
+            JOBS_IN_FLIGHT.dec()
+            if os.path.exists(pdf_path):
+                try: os.remove(pdf_path)
+                except OSError as e_remove: logging.error(f"Error removing job upload {pdf_path}: {e_remove}")
+        logging.info(f"Job {job_id} finished.")
@@ -0,0 +1,142 @@
+# analyzer/metrics.py
+"""Minimal thread-safe metrics registry rendered in the Prometheus text exposition format."""
+import threading
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"): return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames): raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock: items = sorted(self._values.items())
+        lines.extend(self._render_items(items))
+        return lines
+
+    def _render_items(self, items):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock: self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock: self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock: self._values[key] = value
+
+    def set_function(self, function):
+        """Reads the (unlabelled) value from `function()` at scrape time."""
+        self._function = function
+
+    def render(self):
+        if self._function is not None:
+            try: self.set(self._function())
+            except Exception: pass # A broken probe must not break the scrape
+        return super().render()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None: entry = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound: entry['counts'][i] += 1; break
+            entry['sum'] += value; entry['count'] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock: items = sorted((key, {'counts': list(e['counts']), 'sum': e['sum'], 'count': e['count']}) for key, e in self._values.items())
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry['counts']):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(entry['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {entry['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock: self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        with self._lock: metrics = list(self._metrics)
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_SECONDS = REGISTRY.register(Histogram("pitch_stage_duration_seconds", "Time spent in each analysis pipeline stage.", ["stage"]))
+MODEL_CALLS = REGISTRY.register(Counter("pitch_model_calls_total", "Model API calls by model and outcome.", ["model", "outcome"]))
+MODEL_CALL_SECONDS = REGISTRY.register(Histogram("pitch_model_call_duration_seconds", "Latency of individual model API calls.", ["model"]))
+MODEL_RETRIES = REGISTRY.register(Counter("pitch_model_retries_total", "Model API calls that were retries of a failed attempt.", ["model"]))
+MODEL_TOKENS = REGISTRY.register(Counter("pitch_model_tokens_total", "Tokens reported by the model API.", ["model", "direction"]))
+MODEL_PAYLOAD_BYTES = REGISTRY.register(Counter("pitch_model_payload_bytes_total", "Bytes of prompt text and images sent to the model.", ["model"]))
+BACKOFF_SECONDS = REGISTRY.register(Counter("pitch_backoff_seconds_total", "Time spent waiting on the rate limiter or retry backoff.", ["model", "reason"]))
+ANALYSES = REGISTRY.register(Counter("pitch_analyses_total", "Completed analyses by outcome.", ["outcome"]))
+ANALYSES_IN_FLIGHT = REGISTRY.register(Gauge("pitch_analyses_in_flight", "Analyses currently running (sync requests and jobs)."))
+JOBS_IN_FLIGHT = REGISTRY.register(Gauge("pitch_jobs_in_flight", "Background jobs currently running."))
+JOBS_QUEUED = REGISTRY.register(Gauge("pitch_jobs_queued", "Background jobs waiting for a worker."))
+OCR_CACHE_EVENTS = REGISTRY.register(Counter("pitch_ocr_cache_total", "OCR cache lookups by result.", ["result"]))
+RESULT_STORE_EVENTS = REGISTRY.register(Counter("pitch_result_store_total", "Analysis requests by result-store outcome (hit, coalesced, miss).", ["result"]))
+SCORE_CACHE_EVENTS = REGISTRY.register(Counter("pitch_score_cache_total", "Section score and feedback memo lookups by kind and result.", ["kind", "result"]))
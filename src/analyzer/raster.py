@@ -0,0 +1,69 @@
+# analyzer/raster.py
+import os
+import logging
+import subprocess
+
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+import config
+
+
+def page_count(pdf_path, poppler_path=None):
+    """Returns the number of pages in the PDF without rendering any of them."""
+    info = pdfinfo_from_path(pdf_path, poppler_path=poppler_path)
+    return int(info["Pages"])
+
+
+def extract_text_layer(pdf_path, total, poppler_path=None):
+    """Returns the embedded text of every page via poppler's pdftotext, or None if unavailable.
+
+    This reads the PDF's own text layer locally; it does not see text inside images.
+    """
+    exe = os.path.join(poppler_path, "pdftotext") if poppler_path else "pdftotext"
+    try:
+        proc = subprocess.run([exe, "-layout", "-enc", "UTF-8", pdf_path, "-"], capture_output=True, timeout=config.TEXT_LAYER_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logging.warning(f"Text layer probe unavailable: {e}")
+        return None
+    if proc.returncode != 0:
+        logging.warning(f"pdftotext failed ({proc.returncode}): {proc.stderr.decode('utf-8', 'replace').strip()}")
+        return None
+    # pdftotext separates pages with form feeds
+    pages = proc.stdout.decode("utf-8", "replace").split("\f")[:total]
+    return pages + [""] * (total - len(pages))
+
+
+def has_usable_text(text):
+    """True if a page's text layer is dense enough to skip vision OCR."""
+    return len("".join(text.split())) >= config.TEXT_LAYER_MIN_CHARS
+
+
+def iter_page_images(pdf_path, pages, dpi=None, window=None, poppler_path=None):
+    """Yields (page_num, image) one page at a time for the given 1-based page numbers.
+
+    Consecutive pages are rendered up to `window` per poppler call, so only the current
+    window is decoded at once and memory stays flat regardless of deck length. Each
+    window is split across up to RASTER_THREADS pdftoppm processes.
+    """
+    dpi = dpi or config.RASTER_DPI
+    window = max(1, window or config.RASTER_WINDOW_PAGES)
+    for first, last in _page_runs(sorted(pages), window):
+        images = convert_from_path(pdf_path, dpi=dpi, first_page=first, last_page=last,
+                                   thread_count=min(config.RASTER_THREADS, last - first + 1), poppler_path=poppler_path)
+        logging.info(f"Rendered pages {first}-{last}.")
+        page_num = first
+        # Pop as we go so the generator does not keep references to pages already handed out
+        while images:
+            yield page_num, images.pop(0)
+            page_num += 1
+
+
+def _page_runs(pages, window):
+    """Groups sorted page numbers into (first, last) runs of consecutive pages, at most `window` long."""
+    run_start = prev = None
+    for page in pages:
+        if run_start is not None and page == prev + 1 and page - run_start < window:
+            prev = page; continue
+        if run_start is not None: yield run_start, prev
+        run_start = prev = page
+    if run_start is not None: yield run_start, prev
@@ -0,0 +1,103 @@
+# analyzer/ratelimit.py
+import re
+import time
+import logging
+import threading
+
+import config
+
+
+class RateLimiter:
+    """Token-bucket limiter for requests-per-minute and tokens-per-minute quotas.
+
+    One instance is shared by every thread calling the same model, so concurrent
+    OCR workers draw from a single budget. A rate-limit response from the API
+    pauses all callers until the server-provided retry time has passed.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute=0):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self._lock = threading.Lock()
+        self._request_allowance = float(requests_per_minute)
+        self._token_allowance = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+
+    @property
+    def enabled(self):
+        return self.rpm > 0 or self.tpm > 0
+
+    def _refill(self, now):
+        """Adds allowance accrued since the last refill (lock must be held)."""
+        elapsed = now - self._last_refill
+        if elapsed <= 0: return # Nothing accrues until a pause has ended
+        self._last_refill = now
+        if self.rpm > 0: self._request_allowance = min(float(self.rpm), self._request_allowance + elapsed * self.rpm / 60.0)
+        if self.tpm > 0: self._token_allowance = min(float(self.tpm), self._token_allowance + elapsed * self.tpm / 60.0)
+
+    def acquire(self, tokens=0):
+        """Blocks until one request and `tokens` tokens fit in the budget. Returns seconds waited.
+
+        With both quotas at 0 there is no budget, but a pause() is still honoured.
+        """
+        # A single call larger than the whole minute budget would never fit; cap it
+        tokens = min(tokens, self.tpm) if self.tpm > 0 else 0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    need_req = 1 - self._request_allowance if self.rpm > 0 else 0
+                    need_tok = tokens - self._token_allowance if self.tpm > 0 else 0
+                    if need_req <= 0 and need_tok <= 0:
+                        if self.rpm > 0: self._request_allowance -= 1
+                        if self.tpm > 0: self._token_allowance -= tokens
+                        return waited
+                    wait = max(need_req * 60.0 / self.rpm if self.rpm > 0 else 0,
+                               need_tok * 60.0 / self.tpm if self.tpm > 0 else 0)
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds):
+        """Stops all callers from acquiring for `seconds` (e.g. after a 429 / Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            # Start from an empty request bucket so workers do not burst as soon as the pause ends
+            self._request_allowance = min(self._request_allowance, 0.0)
+            self._last_refill = max(self._last_refill, self._paused_until)
+        logging.warning(f"Rate limit hit; pausing all model calls for {seconds:.2f}s.")
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model_name):
+    """Returns the process-wide limiter for `model_name`, creating it on first use."""
+    with _limiters_lock:
+        if model_name not in _limiters:
+            _limiters[model_name] = RateLimiter(config.LLM_REQUESTS_PER_MINUTE, config.LLM_TOKENS_PER_MINUTE)
+        return _limiters[model_name]
+
+
+def retry_after_seconds(error):
+    """Extracts a server-suggested retry delay from an API error, or None if it has none."""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers:
+        value = headers.get('Retry-After') or headers.get('retry-after')
+        if value:
+            try: return max(0.0, float(value))
+            except ValueError: pass
+    # gRPC errors carry the delay as RetryInfo in the message/details
+    match = re.search(r'retry_delay\s*\{\s*seconds:\s*(\d+)', str(error)) or re.search(r'retry in ([\d.]+)\s*s', str(error), re.IGNORECASE)
+    if match: return float(match.group(1))
+    return None
+
+
+def estimate_tokens(text="", images=0, max_output_tokens=0):
+    """Rough token estimate for budgeting: ~4 chars per token, a fixed cost per image, plus the output cap."""
+    return len(text) // 4 + images * config.LLM_TOKENS_PER_IMAGE + max_output_tokens
@@ -0,0 +1,111 @@
+# analyzer/sections.py
+import re
+
+import numpy as np
+
+import config
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9$%'&+-]*")
+
+
+def _ngrams(words, max_n):
+    """Word n-grams (1..max_n) of the token list `words`, joined with single spaces."""
+    for n in range(1, max_n + 1):
+        for i in range(len(words) - n + 1):
+            yield " ".join(words[i:i + n])
+
+
+class SectionClassifier:
+    """Keyword/TF-IDF classifier that maps pages to target sections locally.
+
+    Each section is represented by its vocabulary (config.SECTION_KEYWORDS); terms shared
+    by several sections are down-weighted. Pages are turned into TF-IDF vectors over the
+    same vocabulary and scored against every section at once with one matrix product,
+    giving a cosine similarity per (page, section). Terms in the first words of a page's
+    first line (usually the slide title) count extra.
+    """
+
+    def __init__(self, sections=None, keywords=None):
+        self.sections = list(sections or config.TARGET_SECTIONS)
+        keywords = keywords or config.SECTION_KEYWORDS
+        vocab = sorted({term.lower() for section in self.sections for term in keywords.get(section, [])})
+        self.term_index = {term: i for i, term in enumerate(vocab)}
+        self.max_n = max((len(term.split()) for term in vocab), default=1)
+        # Section matrix (terms x sections), weighted by how specific each term is to a section
+        matrix = np.zeros((len(vocab), len(self.sections)))
+        for j, section in enumerate(self.sections):
+            for term in keywords.get(section, []): matrix[self.term_index[term.lower()], j] = 1.0
+        section_df = matrix.sum(axis=1, keepdims=True)
+        matrix *= np.log(1.0 + len(self.sections) / np.maximum(section_df, 1.0))
+        norms = np.linalg.norm(matrix, axis=0, keepdims=True)
+        self.section_matrix = matrix / np.where(norms == 0, 1.0, norms)
+
+    def _page_matrix(self, pages_text):
+        """TF-IDF matrix (pages x terms) over the section vocabulary, rows L2-normalised."""
+        counts = np.zeros((len(pages_text), len(self.term_index)))
+        for i, text in enumerate(pages_text):
+            words = _TOKEN_RE.findall((text or "").lower())
+            for gram in _ngrams(words, self.max_n):
+                j = self.term_index.get(gram)
+                if j is not None: counts[i, j] += 1
+            title = _TOKEN_RE.findall((text or "").strip().split("\n", 1)[0].lower())[:config.SECTION_CLASSIFIER_TITLE_WORDS]
+            for gram in _ngrams(title, self.max_n):
+                j = self.term_index.get(gram)
+                if j is not None: counts[i, j] += config.SECTION_CLASSIFIER_TITLE_WEIGHT - 1
+        tf = np.where(counts > 0, 1.0 + np.log(np.maximum(counts, 1.0)), 0.0)
+        # Terms on every page (e.g. a footer) say little about any one page
+        df = (counts > 0).sum(axis=0)
+        idf = np.log((1.0 + len(pages_text)) / (1.0 + df)) + 1.0
+        weighted = tf * idf
+        norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+        return weighted / np.where(norms == 0, 1.0, norms)
+
+    def score(self, pages_text):
+        """Returns the (pages x sections) cosine similarity matrix."""
+        if not pages_text or not self.term_index: return np.zeros((len(pages_text), len(self.sections)))
+        return self._page_matrix(pages_text) @ self.section_matrix
+
+    def classify(self, pages_text):
+        """Maps pages to sections.
+
+        Returns (section_map, uncertain, guesses): section_map holds confident assignments
+        ({section: [0-based page indices]}); uncertain lists page indices whose best score
+        is weak or too close to the runner-up; guesses holds the best section per uncertain
+        page so callers can fall back to it. Pages with no section vocabulary at all
+        (title, thank-you, blank) are left unassigned.
+        """
+        scores = self.score(pages_text)
+        section_map, uncertain, guesses = {}, [], {}
+        if scores.size == 0: return section_map, uncertain, guesses
+        order = np.argsort(-scores, axis=1)
+        best = scores[np.arange(len(scores)), order[:, 0]]
+        runner_up = scores[np.arange(len(scores)), order[:, 1]] if scores.shape[1] > 1 else np.zeros(len(scores))
+        for i in range(len(pages_text)):
+            if best[i] <= 0: continue
+            top = self.sections[order[i, 0]]
+            if best[i] < config.SECTION_CLASSIFIER_MIN_SCORE or best[i] - runner_up[i] < config.SECTION_CLASSIFIER_MIN_MARGIN:
+                uncertain.append(i); guesses[i] = top
+                continue
+            # A slide can cover more than one section (e.g. "Business Model & Financials")
+            for j in order[i]:
+                if scores[i, j] < best[i] * config.SECTION_CLASSIFIER_MULTI_RATIO: break
+                section_map.setdefault(self.sections[j], []).append(i)
+        return section_map, uncertain, guesses
+
+
+_classifier = None
+
+
+def get_classifier():
+    """Returns the shared classifier built from config (vocabulary matrices are built once)."""
+    global _classifier
+    if _classifier is None: _classifier = SectionClassifier()
+    return _classifier
+
+
+def merge_section_maps(*maps):
+    """Unions {section: [page indices]} maps into one with sorted, de-duplicated pages."""
+    merged = {}
+    for section_map in maps:
+        for section, pages in section_map.items(): merged.setdefault(section, set()).update(pages)
+    return {section: sorted(pages) for section, pages in merged.items() if pages}
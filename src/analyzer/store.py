@@ -0,0 +1,167 @@
+# analyzer/store.py
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+import config
+from analyzer.cache import content_key, file_hash
+from analyzer.core import SCORING_INSTRUCTIONS, SECTION_ID_PROMPT, BATCH_SCORING_PROMPT, FEEDBACK_PROMPT
+from analyzer.metrics import RESULT_STORE_EVENTS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pdf_hash TEXT NOT NULL,
+    config_key TEXT NOT NULL,
+    filename TEXT,
+    created_at REAL NOT NULL,
+    overall_score INTEGER,
+    results TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_deck ON analyses (pdf_hash, config_key, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses (created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_score ON analyses (overall_score);
+CREATE INDEX IF NOT EXISTS idx_analyses_filename ON analyses (filename);
+"""
+
+_SUMMARY_COLUMNS = "id, pdf_hash, filename, created_at, overall_score"
+
+# config settings that change what an analysis produces (models, prompts, OCR input, section mapping, scoring)
+_RESULT_SETTINGS = (
+    "LLM_VISION_MODEL", "LLM_TEXT_MODEL", "LLM_TEMPERATURE", "OCR_PROMPT", "OCR_BATCH_PROMPT", "OCR_BATCH_SIZE",
+    "ENCODING_MODE", "ENCODE_MAX_BYTES", "ENCODE_MAX_LONG_EDGE", "ENCODE_MIN_LONG_EDGE", "ENCODE_QUALITY", "ENCODE_MIN_QUALITY",
+    "ENCODE_GRAYSCALE_MAX_SATURATION", "ENCODE_CROP_MARGINS", "ENCODE_CROP_PADDING", "RASTER_DPI", "TEXT_LAYER_ENABLED", "TEXT_LAYER_MIN_CHARS",
+    "SECTION_ID_MODE", "SECTION_ID_ASK_UNMATCHED", "SECTION_KEYWORDS", "SECTION_CLASSIFIER_MIN_SCORE", "SECTION_CLASSIFIER_MIN_MARGIN", "SECTION_CLASSIFIER_MULTI_RATIO",
+    "SECTION_CLASSIFIER_TITLE_WORDS", "SECTION_CLASSIFIER_TITLE_WEIGHT", "TARGET_SECTIONS", "SECTION_WEIGHTS", "SCORING_CRITERIA", "SCORING_MODE",
+)
+
+
+def scoring_config_key():
+    """Hash of every setting and prompt template that changes an analysis result; stored results from other settings are not reused."""
+    settings = json.dumps({name: getattr(config, name, None) for name in _RESULT_SETTINGS}, sort_keys=True, default=str)
+    return content_key(settings, SCORING_INSTRUCTIONS, SECTION_ID_PROMPT, BATCH_SCORING_PROMPT, FEEDBACK_PROMPT)
+
+
+class ResultStore:
+    """SQLite store of finished analyses, keyed by the PDF's content hash.
+
+    Successful results are saved with the scoring configuration they were produced
+    under, so re-uploading an identical deck returns the stored result instantly.
+    Concurrent analyses of the same deck are coalesced: the first request runs the
+    pipeline and the others wait for its result. Safe to share between threads.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or config.RESULT_STORE_PATH
+        if os.path.dirname(self.path): os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def _query(self, sql, params=()):
+        with self._lock: return self._conn.execute(sql, params).fetchall()
+
+    def _load(self, row):
+        results = json.loads(row["results"])
+        results["stored"] = {"id": row["id"], "pdf_hash": row["pdf_hash"], "filename": row["filename"], "created_at": row["created_at"]}
+        return results
+
+    def lookup(self, digest):
+        """Returns the latest stored results for this PDF hash under the current scoring config, or None."""
+        rows = self._query("SELECT * FROM analyses WHERE pdf_hash = ? AND config_key = ? ORDER BY created_at DESC LIMIT 1",
+                           (digest, scoring_config_key()))
+        return self._load(rows[0]) if rows else None
+
+    def get(self, analysis_id):
+        """Returns stored results by id, or None."""
+        rows = self._query("SELECT * FROM analyses WHERE id = ?", (analysis_id,))
+        return self._load(rows[0]) if rows else None
+
+    def save(self, digest, filename, results):
+        """Stores a successful analysis and returns its id.
+
+        Failed analyses, and degraded ones where any model call failed (their zero scores
+        or placeholder feedback come from an outage, not the deck), are not stored.
+        """
+        if results.get("error") or results.get("degraded"): return None
+        record = {k: v for k, v in results.items() if k != "stored"}
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO analyses (pdf_hash, config_key, filename, created_at, overall_score, results) VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, scoring_config_key(), filename, time.time(), results.get("overall_score"), json.dumps(record)))
+            return cursor.lastrowid
+
+    def search(self, deck=None, since=None, until=None, min_score=None, max_score=None, limit=None):
+        """Lists stored analyses (newest first) as summary dicts.
+
+        `deck` matches a filename substring or a PDF hash prefix; `since`/`until` are
+        Unix timestamps and `min_score`/`max_score` bound the overall score.
+        """
+        clauses, params = [], []
+        if deck: clauses.append("(filename LIKE ? OR pdf_hash LIKE ?)"); params += [f"%{deck}%", f"{deck.lower()}%"]
+        if since is not None: clauses.append("created_at >= ?"); params.append(since)
+        if until is not None: clauses.append("created_at <= ?"); params.append(until)
+        if min_score is not None: clauses.append("overall_score >= ?"); params.append(min_score)
+        if max_score is not None: clauses.append("overall_score <= ?"); params.append(max_score)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(min(limit or config.RESULT_STORE_QUERY_LIMIT, config.RESULT_STORE_QUERY_LIMIT))
+        rows = self._query(f"SELECT {_SUMMARY_COLUMNS} FROM analyses {where} ORDER BY created_at DESC LIMIT ?", params)
+        return [dict(row) for row in rows]
+
+    def analyze(self, pdf_path, filename, run):
+        """Returns results for the deck at `pdf_path`, calling run(pdf_path) only if needed.
+
+        Serves a stored result when one exists; otherwise joins an in-flight analysis of
+        the same deck, or runs one and stores it.
+        """
+        digest = file_hash(pdf_path)
+        stored = self.lookup(digest)
+        if stored:
+            RESULT_STORE_EVENTS.inc(result="hit"); logging.info(f"Serving stored analysis {stored['stored']['id']} for {filename}.")
+            return stored
+        with self._lock:
+            pending = self._inflight.get(digest)
+            owner = pending is None
+            if owner: pending = self._inflight[digest] = Future()
+        if not owner:
+            RESULT_STORE_EVENTS.inc(result="coalesced"); logging.info(f"Joining in-flight analysis of {filename} ({digest[:12]}).")
+            return pending.result()
+        try:
+            # An identical run may have been stored between the lookup above and taking ownership
+            results = self.lookup(digest)
+            if results is None:
+                RESULT_STORE_EVENTS.inc(result="miss")
+                results = run(pdf_path)
+                analysis_id = self.save(digest, filename, results)
+                if analysis_id: results["stored"] = {"id": analysis_id, "pdf_hash": digest, "filename": filename, "created_at": time.time()}
+            else: RESULT_STORE_EVENTS.inc(result="hit")
+            pending.set_result(results)
+            return results
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._lock: self._inflight.pop(digest, None)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_result_store():
+    """Returns the process-wide result store, or None if disabled/unavailable."""
+    global _store
+    if not config.RESULT_STORE_ENABLED: return None
+    with _store_lock:
+        if _store is None:
+            try: _store = ResultStore(config.RESULT_STORE_PATH)
+            except (OSError, sqlite3.Error) as e: logging.error(f"Could not open result store at {config.RESULT_STORE_PATH}: {e}"); return None
+        return _store
@@ -0,0 +1,62 @@
+# analyzer/timing.py
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+from analyzer.metrics import STAGE_SECONDS
+
+
+def _children_cpu_time():
+    """User+system CPU seconds of this process's finished child processes (0 where unavailable)."""
+    if resource is None: return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class StageTimer:
+    """Accumulates wall time, CPU time and call counts per pipeline stage, plus named counters.
+
+    Stages may be timed from several threads at once (e.g. concurrent OCR), so a
+    stage's wall time is the summed busy time of all its calls, which can exceed the
+    elapsed time of the whole analysis. Every timed call is also observed in the
+    process-wide stage latency histogram.
+
+    CPU time is the calling thread's own. Stages that run external programs (poppler's
+    pdftoppm/pdftotext) pass children=True to also count the CPU of child processes
+    that finish during the stage; that figure is process-wide, so it is exact only
+    when one analysis runs per process (as in the benchmark harness).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+
+    @contextmanager
+    def stage(self, name, children=False):
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        children_start = _children_cpu_time() if children else 0.0
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall_start, time.thread_time() - cpu_start
+            if children: cpu += _children_cpu_time() - children_start
+            with self._lock:
+                entry = self._stages.setdefault(name, {'wall_s': 0.0, 'cpu_s': 0.0, 'calls': 0})
+                entry['wall_s'] += wall; entry['cpu_s'] += cpu; entry['calls'] += 1
+            STAGE_SECONDS.observe(wall, stage=name)
+
+    def add(self, name, amount=1):
+        """Adds to a named counter (e.g. bytes sent to the model)."""
+        with self._lock: self._counters[name] = self._counters.get(name, 0) + amount
+
+    def snapshot(self):
+        """Returns {'stages': {name: {wall_s, cpu_s, calls}}, 'counters': {...}} with rounded times."""
+        with self._lock:
+            stages = {name: {'wall_s': round(e['wall_s'], 4), 'cpu_s': round(e['cpu_s'], 4), 'calls': e['calls']} for name, e in self._stages.items()}
+            return {'stages': stages, 'counters': dict(self._counters)}
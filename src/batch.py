@@ -0,0 +1,128 @@
+# batch.py
+"""Command-line batch analysis of many pitch decks.
+
+Usage:
+    python batch.py DECKS_DIR_OR_MANIFEST -o results.jsonl [--workers N] [--rpm N] [--retry-failed]
+
+The source is either a directory (searched for *.pdf) or a manifest text file with
+one PDF path per line. One JSON record per deck is appended to the output file as
+soon as that deck finishes, so an interrupted run can simply be restarted: decks
+that already have a record in the output are skipped, including failed ones (so a
+deck that fails every time does not use up quota on each run). Pass --retry-failed
+to re-run the decks whose record has an error.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.insert(0, script_dir)
+
+import config
+from analyzer.core import PitchAnalyzer
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(threadName)s - %(message)s')
+
+
+def find_decks(source, recursive=False):
+    """Returns absolute PDF paths from a directory or a manifest file (one path per line, '#' comments)."""
+    if os.path.isdir(source):
+        if recursive:
+            paths = [os.path.join(root, name) for root, _, names in os.walk(source) for name in names]
+        else:
+            paths = [os.path.join(source, name) for name in os.listdir(source)]
+        paths = [p for p in paths if p.lower().endswith('.pdf') and os.path.isfile(p)]
+    else:
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, 'r', encoding='utf-8') as f:
+            lines = [line.strip() for line in f]
+        paths = [line if os.path.isabs(line) else os.path.join(base, line) for line in lines if line and not line.startswith('#')]
+    return sorted(os.path.abspath(p) for p in paths)
+
+
+def load_finished(output_path, retry_failed=False):
+    """Returns the set of deck paths that already have a record in the output file (only successful ones with `retry_failed`)."""
+    finished = set()
+    if not os.path.exists(output_path): return finished
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try: record = json.loads(line)
+            except json.JSONDecodeError: continue # Partial last line from an interrupted run
+            if retry_failed and record.get('status') != 'ok': continue
+            finished.add(record.get('path'))
+    return finished
+
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+_thread_state = threading.local()
+
+
+def analyze_deck(pdf_path):
+    """Runs the pipeline on one deck with this thread's analyzer and returns its JSONL record."""
+    if not hasattr(_thread_state, 'analyzer'):
+        _thread_state.analyzer = PitchAnalyzer()
+    started = time.time()
+    try:
+        results = _thread_state.analyzer.analyze(pdf_path)
+        error = results.get('error')
+    except Exception as e:
+        logging.error(f"Analysis crashed for {pdf_path}: {e}", exc_info=True)
+        results, error = {}, f"Unexpected error: {e}"
+    finished = time.time()
+    return {
+        'deck': os.path.basename(pdf_path), 'path': pdf_path, 'status': 'error' if error else 'ok',
+        'overall_score': results.get('overall_score'), 'section_scores': results.get('section_scores'),
+        'feedback': results.get('feedback'), 'page_sources': results.get('page_sources'),
+        'fingerprints': results.get('fingerprints'), 'reused': results.get('reused'), 'error': error,
+        'timings': results.get('timings'), 'started_at': started, 'finished_at': finished, 'elapsed_s': round(finished - started, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a directory or manifest of pitch deck PDFs into a JSONL file.")
+    parser.add_argument('source', help="Directory of PDFs or manifest file with one PDF path per line")
+    parser.add_argument('-o', '--output', default='batch_results.jsonl', help="JSONL output file (appended to; used to resume)")
+    parser.add_argument('-w', '--workers', type=int, default=config.BATCH_WORKERS, help="Decks analyzed concurrently")
+    parser.add_argument('--rpm', type=int, default=None, help="Override LLM_REQUESTS_PER_MINUTE for this run (shared by all workers)")
+    parser.add_argument('--tpm', type=int, default=None, help="Override LLM_TOKENS_PER_MINUTE for this run (shared by all workers)")
+    parser.add_argument('-r', '--recursive', action='store_true', help="Search subdirectories for PDFs")
+    parser.add_argument('--retry-failed', action='store_true', help="Re-run decks whose previous record has an error")
+    args = parser.parse_args(argv)
+
+    # Limiters are created lazily from config, so overriding before the first call applies process-wide
+    if args.rpm is not None: config.LLM_REQUESTS_PER_MINUTE = args.rpm
+    if args.tpm is not None: config.LLM_TOKENS_PER_MINUTE = args.tpm
+
+    decks = find_decks(args.source, recursive=args.recursive)
+    finished = load_finished(args.output, retry_failed=args.retry_failed)
+    pending = [deck for deck in decks if deck not in finished]
+    logging.info(f"Found {len(decks)} decks; {len(decks) - len(pending)} already done, {len(pending)} to analyze.")
+    if not pending: return 0
+
+    failures = 0
+    with open(args.output, 'a', encoding='utf-8') as out, \
+         ThreadPoolExecutor(max_workers=max(1, args.workers), thread_name_prefix="deck") as pool:
+        if out.tell() and not _ends_with_newline(args.output): out.write("\n") # Terminate a truncated last record
+        futures = {pool.submit(analyze_deck, deck): deck for deck in pending}
+        for i, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            if record['status'] != 'ok': failures += 1
+            out.write(json.dumps(record) + "\n"); out.flush() # Records are written from this thread only
+            logging.info(f"[{i}/{len(pending)}] {record['deck']}: {record['status']} (score {record['overall_score']}, {record['elapsed_s']}s)")
+    logging.info(f"Batch finished: {len(pending) - failures} ok, {failures} failed. Results in {args.output}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
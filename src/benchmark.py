@@ -0,0 +1,196 @@
+# benchmark.py
+"""End-to-end pipeline benchmark over the bundled sample decks.
+
+Usage:
+    python benchmark.py [DECK ...] [--repeat N] [--latency S] [--save-baseline] [--baseline PATH]
+    python benchmark.py [DECK ...] --compare-encoding [--max-pages N]
+
+Each deck is analyzed in a fresh process against the synthetic 'stub' model backend
+(no API key or network), with the OCR cache, score memo and rate limiter disabled so every run
+does the same work. Per-stage wall time, CPU time, peak RSS and bytes sent to the
+model are reported. --save-baseline writes the results to the baseline file; without
+it, results are compared against the baseline and any stage slower than the allowed
+tolerance is reported as a regression (exit code 1).
+
+--compare-encoding instead OCRs every page twice through the configured backend
+(LLM_BACKEND, so normally the live API): once with the legacy full-size JPEG and once
+with the adaptive encoding. It reports bytes uploaded, OCR latency, text similarity
+between the two outputs and whether section identification still agrees.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import statistics
+import multiprocessing
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+if script_dir not in sys.path:
+    sys.path.insert(0, script_dir)
+
+import config
+
+DEFAULT_DECKS_DIR = os.path.join(os.path.dirname(script_dir), 'data')
+DEFAULT_BASELINE = os.path.join(os.path.dirname(script_dir), 'benchmarks', 'baseline.json')
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where unsupported."""
+    try: import resource
+    except ImportError: return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1) # bytes on macOS, KB on Linux
+
+
+def _run_deck(pdf_path, latency, result_queue):
+    """Child-process entry point: analyzes one deck with the stub backend and reports its timings."""
+    logging.basicConfig(level=logging.WARNING)
+    config.LLM_BACKEND = 'stub'
+    config.LLM_STUB_LATENCY = latency
+    config.OCR_CACHE_ENABLED = False
+    config.SCORE_CACHE_ENABLED = False
+    config.LLM_REQUESTS_PER_MINUTE = 0
+    config.LLM_TOKENS_PER_MINUTE = 0
+    config.INTER_PAGE_DELAY = 0
+    from analyzer.core import PitchAnalyzer
+    results = PitchAnalyzer().analyze(pdf_path)
+    result_queue.put({'timings': results['timings'], 'error': results['error'], 'peak_rss_mb': _peak_rss_mb(),
+                      'pages': len(results['page_sources']), 'ocr_pages': results['page_sources'].count('ocr')})
+
+
+def run_deck(pdf_path, latency):
+    """Runs one deck in a fresh process so peak RSS is per deck, not cumulative."""
+    ctx = multiprocessing.get_context('spawn')
+    result_queue = ctx.Queue()
+    proc = ctx.Process(target=_run_deck, args=(pdf_path, latency, result_queue))
+    proc.start()
+    try: result = result_queue.get(timeout=config.BENCHMARK_DECK_TIMEOUT)
+    except Exception: result = {'error': 'Benchmark process produced no result (crashed or timed out).'}
+    proc.join(timeout=5)
+    if proc.is_alive(): proc.terminate()
+    return result
+
+
+def summarize(runs):
+    """Collapses repeated runs of one deck into median per-stage numbers."""
+    ok = [run for run in runs if not run.get('error')]
+    if not ok: return {'error': runs[-1].get('error')}
+    stages = {}
+    for name in ok[0]['timings']['stages']:
+        stages[name] = {key: round(statistics.median(run['timings']['stages'].get(name, {}).get(key, 0) for run in ok), 4) for key in ('wall_s', 'cpu_s')}
+    counters = ok[0]['timings']['counters']
+    return {'stages': stages, 'peak_rss_mb': statistics.median(run['peak_rss_mb'] or 0 for run in ok),
+            'bytes_sent': counters.get('bytes_sent', 0), 'image_bytes': counters.get('image_bytes', 0), 'model_calls': counters.get('model_calls', 0),
+            'pages': ok[0]['pages'], 'ocr_pages': ok[0]['ocr_pages'], 'runs': len(ok)}
+
+
+def compare(current, baseline, tolerance, min_delta):
+    """Returns human-readable regressions of `current` against `baseline` (both keyed by deck name)."""
+    regressions = []
+    for deck, result in current.items():
+        base = baseline.get(deck)
+        if not base or 'stages' not in base or 'stages' not in result: continue
+        for name, t in result['stages'].items():
+            old = base['stages'].get(name, {}).get('wall_s')
+            if old is not None and t['wall_s'] > old * (1 + tolerance) and t['wall_s'] - old > min_delta:
+                regressions.append(f"{deck}: stage '{name}' {old:.3f}s -> {t['wall_s']:.3f}s")
+        for key in ('peak_rss_mb', 'bytes_sent', 'model_calls'):
+            old, new = base.get(key), result.get(key)
+            if old and new and new > old * (1 + tolerance):
+                regressions.append(f"{deck}: {key} {old} -> {new}")
+    return regressions
+
+
+def compare_encoding(decks, max_pages):
+    """OCRs each page with legacy and adaptive encoding and reports payload, latency and fidelity."""
+    from analyzer.core import PitchAnalyzer
+    from analyzer import raster, encoding
+    config.OCR_CACHE_ENABLED = False # Both variants must really hit the model
+    config.ENCODING_MODE = 'adaptive'
+    analyzer = PitchAnalyzer()
+    if not analyzer.genai_configured:
+        print("Model backend not configured; --compare-encoding needs a live, record or replay backend."); return 1
+    variants = (('legacy', encoding.encode_legacy), ('adaptive', encoding.encode_page))
+    for pdf_path in decks:
+        total = raster.page_count(pdf_path)
+        pages = list(range(1, min(total, max_pages) + 1)) if max_pages else list(range(1, total + 1))
+        stats = {name: {'bytes': 0, 'latency': 0.0, 'texts': []} for name, _ in variants}
+        for page_num, image in raster.iter_page_images(pdf_path, pages):
+            for name, encode in variants:
+                data, mime_type, _ = encode(image)
+                start = time.perf_counter()
+                text = analyzer._call_gemini_vision_ocr(data, mime_type) or ""
+                stats[name]['latency'] += time.perf_counter() - start
+                stats[name]['bytes'] += len(data)
+                stats[name]['texts'].append(text)
+            image.close()
+        legacy, adaptive = stats['legacy'], stats['adaptive']
+        similarity = statistics.mean(encoding.text_similarity(a, b) for a, b in zip(legacy['texts'], adaptive['texts'])) if pages else 1.0
+        sections_legacy = analyzer._identify_sections(legacy['texts'])
+        sections_adaptive = analyzer._identify_sections(adaptive['texts'])
+        n = max(1, len(pages))
+        print(f"\n{os.path.basename(pdf_path)} ({len(pages)} pages)")
+        print(f"  bytes/page     legacy {legacy['bytes'] / n / 1024:>8.0f} KiB   adaptive {adaptive['bytes'] / n / 1024:>8.0f} KiB")
+        print(f"  OCR latency    legacy {legacy['latency'] / n:>8.2f} s     adaptive {adaptive['latency'] / n:>8.2f} s")
+        print(f"  text similarity {similarity:.3f}   section map {'identical' if sections_legacy == sections_adaptive else f'DIFFERS: {sections_legacy} vs {sections_adaptive}'}")
+    return 0
+
+
+def print_report(results):
+    for deck, result in results.items():
+        if 'error' in result: print(f"\n{deck}: ERROR {result['error']}"); continue
+        print(f"\n{deck}: {result['pages']} pages ({result['ocr_pages']} OCR), {result['model_calls']} model calls, "
+              f"{result['bytes_sent'] / 1024:.0f} KiB sent ({result['image_bytes'] / 1024:.0f} KiB images), peak RSS {result['peak_rss_mb']} MB")
+        for name, t in result['stages'].items():
+            print(f"  {name:<18} wall {t['wall_s']:>8.3f}s   cpu {t['cpu_s']:>8.3f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline on sample decks with a stub model backend.")
+    parser.add_argument('decks', nargs='*', help=f"PDFs to benchmark (default: all PDFs in {DEFAULT_DECKS_DIR})")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per deck; medians are reported")
+    parser.add_argument('--latency', type=float, default=config.LLM_STUB_LATENCY, help="Simulated seconds per model call")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="Write these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=config.BENCHMARK_TOLERANCE, help="Allowed relative slowdown per stage")
+    parser.add_argument('--min-delta', type=float, default=config.BENCHMARK_MIN_DELTA, help="Ignore stage slowdowns smaller than this (seconds)")
+    parser.add_argument('-o', '--output', help="Also write the results JSON here")
+    parser.add_argument('--compare-encoding', action='store_true', help="Compare legacy vs adaptive page encoding through the configured (live) backend")
+    parser.add_argument('--max-pages', type=int, default=0, help="With --compare-encoding, only use the first N pages of each deck")
+    args = parser.parse_args(argv)
+
+    decks = args.decks or sorted(os.path.join(DEFAULT_DECKS_DIR, name) for name in os.listdir(DEFAULT_DECKS_DIR) if name.lower().endswith('.pdf'))
+    if args.compare_encoding:
+        logging.basicConfig(level=logging.WARNING)
+        return compare_encoding(decks, args.max_pages)
+    results = {}
+    for pdf_path in decks:
+        deck = os.path.basename(pdf_path)
+        print(f"Benchmarking {deck} ({args.repeat} runs)...", flush=True)
+        results[deck] = summarize([run_deck(os.path.abspath(pdf_path), args.latency) for _ in range(max(1, args.repeat))])
+    print_report(results)
+
+    report = {'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'latency': args.latency, 'decks': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f: json.dump(report, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f: json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f: baseline = json.load(f)
+    regressions = compare(results, baseline.get('decks', {}), args.tolerance, args.min_delta)
+    if regressions:
+        print("\nREGRESSIONS vs baseline:"); print("\n".join(f"  {r}" for r in regressions))
+        return 1
+    print("\nNo regressions vs baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
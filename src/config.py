@@ -11,9 +11,44 @@ UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'pdf'}
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024 # 16 MB limit
 
+# --- Background Jobs (/jobs API) ---
+JOB_WORKERS = 2 # Analyses run concurrently; size to your Gemini quota
+JOB_QUEUE_MAX = 20 # Jobs waiting beyond this are rejected with 503
+JOB_RESULT_TTL = 3600 # Seconds a finished job's result stays available
+STREAM_RESULTS = True # Upload form streams partial results (server-sent events) instead of waiting on /analyze
+STREAM_HEARTBEAT = 15 # Seconds between keep-alive comments on an idle event stream
+
+# --- Result Store ---
+RESULT_STORE_ENABLED = True # Keep finished analyses in SQLite; identical re-uploads are served from it
+RESULT_STORE_PATH = os.path.join('store', 'results.sqlite3')
+RESULT_STORE_QUERY_LIMIT = 100 # Max rows returned by /results
+
+# --- Batch CLI (batch.py) ---
+BATCH_WORKERS = 2 # Decks analyzed concurrently; all share the per-model rate limits
+
+# --- Benchmark (benchmark.py) ---
+BENCHMARK_TOLERANCE = 0.25 # A stage more than 25% slower than baseline is a regression...
+BENCHMARK_MIN_DELTA = 0.05 # ...if it is also at least this many seconds slower
+BENCHMARK_DECK_TIMEOUT = 600 # Seconds allowed per benchmarked deck
+
 # --- Gemini API Configuration ---
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
+# --- LLM Backend ---
+# 'gemini' = live API, 'record' = live API + save request/response pairs,
+# 'replay' = serve saved pairs offline (no key or network needed)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_RECORDINGS_DIR = os.getenv("LLM_RECORDINGS_DIR", os.path.join('recordings', 'llm'))
+LLM_REPLAY_LATENCY = 0.0 # Seconds added to every replayed call
+LLM_REPLAY_JITTER = 0.0 # +/- seconds of uniform random jitter on the latency
+LLM_REPLAY_ERROR_RATE = 0.0 # Fraction of replayed calls that raise an injected 429/503
+LLM_REPLAY_RETRY_AFTER = 1 # Retry hint (seconds) carried by injected 429s
+LLM_REPLAY_SEED = 0 # RNG seed for latency/error injection (repeatable runs)
+LLM_STUB_LATENCY = 0.0 # Seconds per call for the synthetic 'stub' backend (benchmarks)
+LLM_TRANSPORT = 'grpc' # 'grpc' or 'rest'; one client/connection is shared by all calls
+LLM_WARMUP_ON_START = True # Build model clients and open the connection in create_app
+LLM_WARMUP_TIMEOUT = 15 # Seconds allowed per warm-up call
+
 # --- LLM Models ---
 LLM_VISION_MODEL = "gemini-1.5-pro-latest"
 LLM_TEXT_MODEL = "gemini-1.5-flash-latest"
@@ -27,6 +62,30 @@ SECTION_WEIGHTS = {
     "Problem": 20, "Solution": 20, "Market Size": 13, "Business Model": 13,
     "Financial Projections": 14, "Team": 20
 }
+# --- Section Identification ---
+# 'hybrid' = local keyword/TF-IDF classifier, LLM only for uncertain pages
+# 'local'  = classifier only (no LLM call); 'llm' = original all-pages LLM call
+SECTION_ID_MODE = 'hybrid'
+SECTION_ID_ASK_UNMATCHED = True # Hybrid: also ask the LLM about pages with no keyword hits at all (e.g. a team slide of names and photos)
+SECTION_CLASSIFIER_MIN_SCORE = 0.15 # Cosine score a page's best section needs to be trusted...
+SECTION_CLASSIFIER_MIN_MARGIN = 0.03 # ...and its lead over the runner-up
+SECTION_CLASSIFIER_MULTI_RATIO = 0.85 # Also assign other sections scoring within this fraction of the best
+SECTION_CLASSIFIER_TITLE_WORDS = 4 # Leading words of a page's first line treated as its title...
+SECTION_CLASSIFIER_TITLE_WEIGHT = 3 # ...whose terms count this many times
+SECTION_KEYWORDS = {
+    "Problem": ["problem", "problems", "pain", "pain point", "pain points", "challenge", "challenges", "frustrating", "frustration",
+                "inefficient", "expensive", "difficult", "hard to", "struggle", "today", "currently", "broken", "lack of", "no way to", "why now"],
+    "Solution": ["solution", "solutions", "product", "platform", "our product", "how it works", "introducing", "features", "feature",
+                 "app", "technology", "demo", "value proposition", "benefits", "simple", "easy", "unique", "patent", "we solve"],
+    "Market Size": ["market", "market size", "tam", "sam", "som", "total addressable market", "serviceable", "addressable", "market opportunity",
+                    "opportunity", "billion", "industry", "cagr", "growing", "growth rate", "segment", "customers worldwide", "users"],
+    "Business Model": ["business model", "revenue model", "revenue", "pricing", "price", "subscription", "commission", "fee", "fees",
+                       "per month", "per transaction", "take rate", "monetization", "monetize", "margin", "unit economics", "ltv", "cac", "sales channel"],
+    "Financial Projections": ["financials", "financial", "projections", "projected", "forecast", "income", "profit", "ebitda", "cash flow",
+                              "burn", "runway", "funding", "raise", "raising", "investment", "use of funds", "valuation", "year 1", "year 2", "year 3"],
+    "Team": ["team", "founder", "founders", "co-founder", "ceo", "cto", "coo", "cfo", "vp", "advisor", "advisors", "board", "management",
+             "experience", "previously", "formerly", "phd", "mba", "years of experience", "engineer", "director"],
+}
 # Shortened prompts for config file, can be expanded if preferred
 SCORING_CRITERIA = {
     "Problem": "Evaluate 'Problem': 1. Clarity(25) 2. Magnitude/Significance/Data(35) 3. Urgency(20) 4. Target Audience(20). Score(0-100). Justification(2-3 sentences).",
@@ -48,8 +107,54 @@ LLM_RETRY_ATTEMPTS = 3
 LLM_RETRY_DELAY = 5
 
 # --- Rate Limit Handling ---
-INTER_PAGE_DELAY = 10 # ADJUST AS NEEDED
-RATE_LIMIT_BACKOFF_MULTIPLIER = 15
+INTER_PAGE_DELAY = 10 # Only used with OCR_CONCURRENCY = 1 when the rate limiter below is disabled
+RATE_LIMIT_BACKOFF_MULTIPLIER = 15 # Seconds per attempt to pause on a 429 without Retry-After
+LLM_REQUESTS_PER_MINUTE = 30 # Per model, shared by all threads in the process; 0 disables
+LLM_TOKENS_PER_MINUTE = 1000000 # Per model; 0 disables
+LLM_TOKENS_PER_IMAGE = 258 # Approximate input token cost of one page image
+
+# --- Page Rasterization ---
+RASTER_DPI = 200
+RASTER_WINDOW_PAGES = 4 # Pages rendered per poppler call
+RASTER_THREADS = min(4, os.cpu_count() or 1) # pdftoppm processes per window
+RASTER_MAX_INFLIGHT_PAGES = 8 # Max decoded pages held until encoded for OCR (caps peak memory)
+
+# --- Page Image Encoding (for vision OCR) ---
+ENCODING_MODE = 'adaptive' # 'adaptive' or 'legacy' (full-size RGB JPEG, quality 90)
+ENCODE_MAX_BYTES = 400 * 1024 # Target upper bound per page image
+ENCODE_MAX_LONG_EDGE = 1600 # Pixels; pages are downscaled to at most this
+ENCODE_MIN_LONG_EDGE = 900 # Never shrink below this to fit the byte budget
+ENCODE_QUALITY = 85 # Starting JPEG quality...
+ENCODE_MIN_QUALITY = 55 # ...lowered in steps of 10 down to this
+ENCODE_GRAYSCALE_MAX_SATURATION = 12 # Mean HSV saturation (0-255) below which pages are sent as grayscale
+ENCODE_CROP_MARGINS = True # Trim uniform page borders
+ENCODE_CROP_PADDING = 16 # Pixels kept around cropped content
+
+# --- Native Text Layer ---
+TEXT_LAYER_ENABLED = True # Read embedded PDF text locally and skip OCR for those pages
+TEXT_LAYER_MIN_CHARS = 80 # Non-whitespace chars a page needs to skip OCR
+TEXT_LAYER_TIMEOUT = 60 # Seconds allowed for pdftotext
+
+# --- OCR Cache ---
+OCR_PROMPT = "Extract all text visible in this image. Provide only the text content, maintaining layout if possible (e.g., using line breaks)."
+OCR_CACHE_ENABLED = True # Reuse OCR results for identical rendered pages (keyed by image, model and prompt)
+OCR_CACHE_DIR = os.path.join('cache', 'ocr')
+OCR_CACHE_MAX_BYTES = 256 * 1024 * 1024 # LRU entries are evicted above this size
+
+# --- Score Memo ---
+SCORE_CACHE_ENABLED = True # Reuse section scores (and feedback) when a section's text, criteria and model are unchanged
+SCORE_CACHE_DIR = os.path.join('cache', 'scores')
+SCORE_CACHE_MAX_BYTES = 64 * 1024 * 1024 # LRU entries are evicted above this size
+
+# --- OCR Concurrency ---
+OCR_CONCURRENCY = 4 # Pages (or page batches) OCR'd in parallel; 1 = sequential
+OCR_BATCH_SIZE = 1 # Pages per vision request; >1 packs several page images into one call (at most RASTER_MAX_INFLIGHT_PAGES)
+LLM_MAX_TOKENS_OCR_BATCH = 8192 # Output cap for a batched OCR request
+OCR_BATCH_PROMPT = "You are given {count} images, each preceded by its label (\"Image 1:\", \"Image 2:\", ...). Extract all text visible in EACH image, maintaining layout with line breaks. Output ONLY valid JSON: {{\"pages\": [{{\"image\": 1, \"text\": \"...\"}}, ...]}} with exactly one entry per image, in order."
+
+# --- Section Scoring ---
+SCORING_MODE = 'parallel' # 'serial', 'parallel' (one call per section, concurrently) or 'batch' (one call for all sections)
+SCORING_WORKERS = 6 # Concurrent scoring calls in 'parallel' mode and for 'batch' fallbacks
 
 # --- Safety Settings ---
 SAFETY_SETTINGS_TEXT = { HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE, HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE, HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE, HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE, }
@@ -1,19 +1,29 @@
 # routes/main.py
 import os
+import json
+import uuid
 import logging
-from flask import Blueprint, request, render_template, redirect, url_for, flash, current_app
+from datetime import datetime
+from flask import Blueprint, request, render_template, redirect, url_for, flash, current_app, jsonify, Response
 from werkzeug.utils import secure_filename
 
 # Import configuration and the analyzer class
 # Use absolute imports from the project root now
 import config
 from analyzer.core import PitchAnalyzer
+from analyzer.jobs import JobManager, QueueFullError
+from analyzer.store import get_result_store
+from analyzer import metrics
 
 # Create a Blueprint
 main_bp = Blueprint('main', __name__, template_folder='../templates') # Point to correct template folder
 
-# Create a single instance of the analyzer when the blueprint is loaded
-analyzer_instance = PitchAnalyzer()
+# Finished analyses keyed by PDF hash (None if RESULT_STORE_ENABLED is off)
+result_store = get_result_store()
+
+# Background workers for the asynchronous /jobs API (threads start on first submit)
+job_manager = JobManager(workers=config.JOB_WORKERS, max_queue=config.JOB_QUEUE_MAX, store=result_store)
+metrics.JOBS_QUEUED.set_function(job_manager.queue_depth)
 
 def allowed_file(filename):
     """Checks if the uploaded file has a PDF extension."""
@@ -23,7 +33,7 @@ def allowed_file(filename):
 @main_bp.route('/', methods=['GET'])
 def index():
     """Renders the upload form."""
-    return render_template('index.html')
+    return render_template('index.html', stream_results=config.STREAM_RESULTS)
 
 @main_bp.route('/analyze', methods=['POST'])
 def handle_analysis():
@@ -39,15 +49,18 @@ def handle_analysis():
 
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        # Use current_app.config for Flask config values
-        temp_pdf_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
+        # Unique name so concurrent uploads of the same filename cannot overwrite each other
+        temp_pdf_path = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}.pdf")
 
         try:
             file.save(temp_pdf_path)
             logging.info(f"File saved temporarily to {temp_pdf_path}")
 
-            # Run the analysis using the analyzer instance
-            analysis_results = analyzer_instance.analyze(temp_pdf_path)
+            # One analyzer per request: run state lives on the instance (the model backend is shared)
+            analyzer = PitchAnalyzer()
+            # Run the analysis (or reuse a stored / in-flight one for the same deck)
+            if result_store: analysis_results = result_store.analyze(temp_pdf_path, filename, analyzer.analyze)
+            else: analysis_results = analyzer.analyze(temp_pdf_path)
 
             # Pass necessary context to the results template
             return render_template('results.html',
@@ -70,4 +83,155 @@ def handle_analysis():
                     logging.error(f"Error removing temporary file {temp_pdf_path}: {e_remove}")
     else:
         flash('Invalid file type. Please upload a PDF.', 'error')
-        return redirect(url_for('main.index'))
\ No newline at end of file
+        return redirect(url_for('main.index'))
+
+@main_bp.route('/jobs', methods=['POST'])
+def submit_job():
+    """Saves the upload, queues it for background analysis and returns the job id immediately."""
+    file = request.files.get('pdf_file')
+    if file is None or file.filename == '':
+        return jsonify(error='No file selected.'), 400
+    if not allowed_file(file.filename):
+        return jsonify(error='Invalid file type. Please upload a PDF.'), 400
+
+    # Unique name so concurrent uploads of the same filename cannot overwrite each other
+    pdf_path = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}.pdf")
+    file.save(pdf_path)
+    try:
+        job_id = job_manager.submit(pdf_path, secure_filename(file.filename))
+    except QueueFullError as e:
+        os.remove(pdf_path)
+        return jsonify(error=str(e)), 503
+    return jsonify(job_id=job_id,
+                   status_url=url_for('main.job_status', job_id=job_id),
+                   result_url=url_for('main.job_result', job_id=job_id)), 202
+
+@main_bp.route('/stream', methods=['POST'])
+def stream_upload():
+    """Queues the upload as a job and redirects to the live results page, which fills in as the analysis runs."""
+    file = request.files.get('pdf_file')
+    if file is None or file.filename == '':
+        flash('No file selected.', 'error')
+        return redirect(url_for('main.index'))
+    if not allowed_file(file.filename):
+        flash('Invalid file type. Please upload a PDF.', 'error')
+        return redirect(url_for('main.index'))
+
+    pdf_path = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}.pdf")
+    file.save(pdf_path)
+    try:
+        job_id = job_manager.submit(pdf_path, secure_filename(file.filename))
+    except QueueFullError as e:
+        os.remove(pdf_path)
+        flash(f"{e} Please try again shortly.", 'error')
+        return redirect(url_for('main.index'))
+    return redirect(url_for('main.job_live', job_id=job_id))
+
+@main_bp.route('/jobs/<job_id>/live', methods=['GET'])
+def job_live(job_id):
+    """Renders the results page skeleton; its script fills it from /jobs/<job_id>/events."""
+    job = job_manager.get(job_id)
+    if job is None:
+        flash('Unknown or expired analysis.', 'error')
+        return redirect(url_for('main.index'))
+    return render_template('stream.html',
+                           job_id=job_id,
+                           filename=job['filename'],
+                           target_sections=config.TARGET_SECTIONS,
+                           section_weights=config.SECTION_WEIGHTS)
+
+@main_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Streams the job's progress and partial results as server-sent events until it finishes.
+
+    Event names: progress, sections, section_score, overall_score, feedback and done.
+    Event ids are positions in the job's event log, so a reconnecting EventSource
+    (Last-Event-ID) resumes where it left off.
+    """
+    if job_manager.get(job_id) is None: return jsonify(error='Unknown job id.'), 404
+    try: start = int(request.headers.get('Last-Event-ID', -1)) + 1
+    except ValueError: start = 0
+
+    def generate():
+        for event in job_manager.iter_events(job_id, start=start, heartbeat=config.STREAM_HEARTBEAT):
+            if event is None: yield ": keep-alive\n\n"; continue
+            index, name, data = event
+            yield f"id: {index}\nevent: {name}\ndata: {json.dumps(data)}\n\n"
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}) # Stop proxies from buffering the stream
+
+@main_bp.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Returns the job's status and per-stage progress as JSON."""
+    job = job_manager.get(job_id)
+    if job is None: return jsonify(error='Unknown job id.'), 404
+    job.pop('results')
+    return jsonify(job)
+
+@main_bp.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """Renders results.html for a finished job; returns the status with 202 while it is still running."""
+    job = job_manager.get(job_id)
+    if job is None: return jsonify(error='Unknown job id.'), 404
+    if job['status'] in ('queued', 'running'):
+        job.pop('results')
+        return jsonify(job), 202
+    analysis_results = job['results'] or {}
+    return render_template('results.html',
+                           results=analysis_results,
+                           error=job['error'],
+                           target_sections=config.TARGET_SECTIONS,
+                           section_weights=config.SECTION_WEIGHTS)
+
+def _parse_time(value):
+    """Query-string time: Unix timestamp or ISO date/datetime (e.g. 2024-05-01). None if absent."""
+    if not value: return None
+    try: return float(value)
+    except ValueError: return datetime.fromisoformat(value).timestamp()
+
+@main_bp.route('/results', methods=['GET'])
+def list_results():
+    """Lists stored analyses as JSON, filtered by ?deck=, ?since=, ?until=, ?min_score=, ?max_score=, ?limit=."""
+    if not result_store: return jsonify(error='Result store is disabled.'), 404
+    args = request.args
+    try:
+        rows = result_store.search(deck=args.get('deck'), since=_parse_time(args.get('since')), until=_parse_time(args.get('until')),
+                                   min_score=args.get('min_score', type=int), max_score=args.get('max_score', type=int), limit=args.get('limit', type=int))
+    except ValueError as e:
+        return jsonify(error=f"Invalid query: {e}"), 400
+    for row in rows:
+        row['url'] = url_for('main.stored_result', analysis_id=row['id'])
+        row['created'] = datetime.fromtimestamp(row['created_at']).isoformat(timespec='seconds')
+    return jsonify(results=rows)
+
+@main_bp.route('/results/<int:analysis_id>', methods=['GET'])
+def stored_result(analysis_id):
+    """Renders a stored analysis (JSON with ?format=json)."""
+    analysis_results = result_store.get(analysis_id) if result_store else None
+    if analysis_results is None: return jsonify(error='Unknown analysis id.'), 404
+    if request.args.get('format') == 'json': return jsonify(analysis_results)
+    return render_template('results.html',
+                           results=analysis_results,
+                           error=analysis_results.get('error'),
+                           target_sections=config.TARGET_SECTIONS,
+                           section_weights=config.SECTION_WEIGHTS)
+
+@main_bp.route('/results/compare', methods=['GET'])
+def compare_results():
+    """Shows stored analyses side by side: /results/compare?ids=3,7 (or ?ids=3&ids=7)."""
+    if not result_store: return jsonify(error='Result store is disabled.'), 404
+    try: ids = [int(i) for value in request.args.getlist('ids') for i in value.split(',') if i.strip()]
+    except ValueError: return jsonify(error='ids must be integers.'), 400
+    analyses = [a for a in (result_store.get(i) for i in ids) if a is not None]
+    if not analyses: return jsonify(error='No stored analyses found for the given ids.'), 404
+    for a in analyses: a['stored']['created'] = datetime.fromtimestamp(a['stored']['created_at']).strftime('%Y-%m-%d %H:%M')
+    return render_template('compare.html',
+                           analyses=analyses,
+                           target_sections=config.TARGET_SECTIONS,
+                           section_weights=config.SECTION_WEIGHTS)
+
+@main_bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Exposes analyzer, model-call and job metrics in the Prometheus text format."""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
@@ -14,6 +14,7 @@ if project_root not in sys.path:
 # Import configuration and the main routes blueprint
 import config
 from routes.main import main_bp
+from analyzer.backends import get_backend
 
 
 
@@ -41,6 +42,10 @@ def create_app():
     # Register the blueprint containing the routes
     app.register_blueprint(main_bp)
 
+    # Open model connections now so the first analysis does not pay client setup cost
+    if config.LLM_WARMUP_ON_START:
+        get_backend().warm_up([config.LLM_VISION_MODEL, config.LLM_TEXT_MODEL])
+
     logging.info("Flask app created and configured.")
     return app
 
@@ -0,0 +1,17 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# The app imports its modules relative to src/ (e.g. `import config`), as run.py does
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limiters(monkeypatch):
+    """Gives every test its own per-model limiters, so quota spent by one test never makes another wait."""
+    from analyzer import ratelimit
+    monkeypatch.setattr(ratelimit, '_limiters', {})
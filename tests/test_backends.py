@@ -0,0 +1,84 @@
+# tests/test_backends.py
+import json
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+from PIL import Image
+
+import config
+from analyzer.backends import ModelBackend, RecordingBackend, ReplayBackend, ReplayMissError, StubBackend, request_key
+from analyzer.core import PitchAnalyzer
+
+ARGS = (0.1, 256, None, 30)
+
+
+def _image(data):
+    return {'mime_type': 'image/jpeg', 'data': data}
+
+
+def test_incomplete_backend_cannot_be_created():
+    class NoGenerate(ModelBackend): pass
+    with pytest.raises(TypeError): NoGenerate()
+
+
+def test_recorded_requests_replay_offline(tmp_path):
+    recorder = RecordingBackend(StubBackend(), str(tmp_path))
+    text_request = 'Synthesize core section analysis into feedback.'
+    vision_request = ['Extract the text.', _image(b'jpeg bytes')]
+    recorded = [recorder.generate('text-model', text_request, *ARGS), recorder.generate('vision-model', vision_request, *ARGS)]
+    assert len(list(tmp_path.glob('*.json'))) == 2
+
+    replay = ReplayBackend(str(tmp_path))
+    assert [replay.generate('text-model', text_request, *ARGS), replay.generate('vision-model', vision_request, *ARGS)] == recorded
+    with pytest.raises(ReplayMissError): replay.generate('text-model', 'A prompt never recorded.', *ARGS)
+
+
+def test_vision_recordings_with_a_source_ignore_image_bytes(tmp_path):
+    source = 'pdf:abc123 pages:3'
+    recorder = RecordingBackend(StubBackend(), str(tmp_path))
+    recorded = recorder.generate('vision-model', ['Extract the text.', _image(b'rendered by poppler 22')], *ARGS, source)
+    record = json.loads(next(tmp_path.glob('*.json')).read_text())
+    assert record['source'] == source
+
+    replay = ReplayBackend(str(tmp_path))
+    # Another poppler/libjpeg build renders the same page to different bytes
+    assert replay.generate('vision-model', ['Extract the text.', _image(b'rendered by poppler 24')], *ARGS, source) == recorded
+    with pytest.raises(ReplayMissError, match='pages:4') as miss:
+        replay.generate('vision-model', ['Extract the text.', _image(b'rendered by poppler 22')], *ARGS, 'pdf:abc123 pages:4')
+    assert 'Extract the text.' in str(miss.value)
+
+
+def test_request_key_without_source_uses_image_bytes():
+    assert request_key('m', ['p', _image(b'a')], 0.1, 10) != request_key('m', ['p', _image(b'b')], 0.1, 10)
+    assert request_key('m', ['p', _image(b'a')], 0.1, 10, 's') == request_key('m', ['p', _image(b'b')], 0.1, 10, 's')
+    assert request_key('m', ['p', _image(b'a')], 0.1, 10, 's') != request_key('m', ['other prompt', _image(b'a')], 0.1, 10, 's')
+
+
+def test_analyzer_ocr_replays_across_renderers(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'OCR_CACHE_ENABLED', False)
+    deck = tmp_path / 'deck.pdf'
+    deck.write_bytes(b'%PDF-1.4 deck')
+    recordings = tmp_path / 'recordings'
+
+    recording = PitchAnalyzer(backend=RecordingBackend(StubBackend(), str(recordings)))
+    recording._pdf_digest = 'abc123'
+    recorded = recording._ocr_page(2, 5, Image.new('RGB', (64, 48), 'white'))
+
+    replaying = PitchAnalyzer(backend=ReplayBackend(str(recordings)))
+    replaying._pdf_digest = 'abc123'
+    assert replaying._ocr_page(2, 5, Image.new('RGB', (80, 60), 'gray')) == recorded # Different pixels, same page
+
+
+def test_replay_injects_repeatable_errors(tmp_path):
+    first, second = ReplayBackend(str(tmp_path), error_rate=0.5, seed=7), ReplayBackend(str(tmp_path), error_rate=0.5, seed=7)
+
+    def outcomes(backend):
+        seen = []
+        for _ in range(20):
+            try: backend.generate('m', 'p', *ARGS)
+            except google_exceptions.GoogleAPIError as e: seen.append(type(e).__name__)
+            except ReplayMissError: seen.append('miss')
+        return seen
+
+    assert outcomes(first) == outcomes(second)
+    assert {'ResourceExhausted', 'ServiceUnavailable', 'miss'} <= set(outcomes(first))
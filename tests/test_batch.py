@@ -0,0 +1,74 @@
+# tests/test_batch.py
+import json
+
+import pytest
+
+import batch
+
+
+class FakeAnalyzer:
+    """Scores every deck 50, except decks named fail*.pdf which return an error."""
+    calls = []
+
+    def analyze(self, pdf_path):
+        FakeAnalyzer.calls.append(pdf_path)
+        error = 'Text extraction failed.' if 'fail' in pdf_path else None
+        timings = {'stages': {'total': {'wall_s': 0.5, 'cpu_s': 0.1, 'calls': 1}}, 'counters': {'model_calls': 3, 'bytes_sent': 1024}}
+        return {'overall_score': 0 if error else 50, 'section_scores': {}, 'feedback': {}, 'timings': timings, 'error': error}
+
+
+@pytest.fixture
+def decks(tmp_path, monkeypatch):
+    FakeAnalyzer.calls = []
+    monkeypatch.setattr(batch, 'PitchAnalyzer', FakeAnalyzer)
+    source = tmp_path / 'decks'
+    source.mkdir()
+    for name in ('a.pdf', 'b.pdf', 'fail.pdf', 'notes.txt'): (source / name).write_bytes(b'%PDF')
+    return source
+
+
+def _records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_find_decks_from_directory_and_manifest(decks, tmp_path):
+    assert [p.rsplit('/', 1)[1] for p in batch.find_decks(str(decks))] == ['a.pdf', 'b.pdf', 'fail.pdf']
+    manifest = tmp_path / 'manifest.txt'
+    manifest.write_text('# decks to score\ndecks/b.pdf\n\ndecks/a.pdf\n')
+    assert batch.find_decks(str(manifest)) == [str(decks / 'a.pdf'), str(decks / 'b.pdf')]
+
+
+def test_record_includes_per_stage_timings(decks):
+    output = decks.parent / 'out.jsonl'
+    assert batch.main([str(decks), '-o', str(output), '-w', '2']) == 1 # One deck failed
+    records = {record['deck']: record for record in _records(output)}
+    assert records['a.pdf']['status'] == 'ok' and records['fail.pdf']['status'] == 'error'
+    assert records['a.pdf']['timings']['counters']['model_calls'] == 3
+    assert records['a.pdf']['timings']['stages']['total']['wall_s'] == 0.5
+
+
+def test_rerun_resumes_and_retries_failed_only_on_request(decks):
+    output = decks.parent / 'out.jsonl'
+    batch.main([str(decks), '-o', str(output)])
+    FakeAnalyzer.calls = []
+    assert batch.main([str(decks), '-o', str(output)]) == 0
+    assert FakeAnalyzer.calls == [] # Failed decks are skipped too...
+    batch.main([str(decks), '-o', str(output), '--retry-failed'])
+    assert FakeAnalyzer.calls == [str(decks / 'fail.pdf')] # ...unless asked to retry them
+
+
+def test_load_finished_ignores_a_truncated_last_record(tmp_path):
+    output = tmp_path / 'out.jsonl'
+    output.write_text(json.dumps({'path': '/a.pdf', 'status': 'ok'}) + '\n' + json.dumps({'path': '/b.pdf', 'status': 'error'}) + '\n{"path": "/c.p')
+    assert batch.load_finished(str(output)) == {'/a.pdf', '/b.pdf'}
+    assert batch.load_finished(str(output), retry_failed=True) == {'/a.pdf'}
+    assert batch.load_finished(str(tmp_path / 'missing.jsonl')) == set()
+
+
+def test_truncated_record_is_terminated_before_appending(decks):
+    output = decks.parent / 'out.jsonl'
+    output.write_text('{"path": "/interrupted.p')
+    batch.main([str(decks), '-o', str(output)])
+    lines = output.read_text().splitlines()
+    assert lines[0] == '{"path": "/interrupted.p'
+    assert sorted(json.loads(line)['deck'] for line in lines[1:]) == ['a.pdf', 'b.pdf', 'fail.pdf']
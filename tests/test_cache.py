@@ -0,0 +1,69 @@
+# tests/test_cache.py
+import os
+
+from analyzer import cache
+from analyzer.cache import DiskCache, content_key
+
+
+def _set_age(disk_cache, key, mtime):
+    os.utime(disk_cache._path(key), (mtime, mtime))
+
+
+def test_content_key_is_stable_and_separates_parts():
+    assert content_key('a', b'b', 1) == content_key('a', b'b', 1)
+    assert content_key('ab', 'c') != content_key('a', 'bc')
+
+
+def test_put_get_roundtrip_and_stats(tmp_path):
+    disk_cache = DiskCache(str(tmp_path), 10_000)
+    assert disk_cache.get('missing') is None
+    disk_cache.put(content_key('k'), 'value')
+    assert disk_cache.get(content_key('k')) == 'value'
+    stats = disk_cache.stats()
+    assert (stats['hits'], stats['misses'], stats['bytes']) == (1, 1, 5)
+
+
+def test_size_is_measured_from_existing_entries(tmp_path):
+    DiskCache(str(tmp_path), 10_000).put(content_key('k'), 'x' * 100)
+    assert DiskCache(str(tmp_path), 10_000).stats()['bytes'] == 100
+
+
+def test_evicts_least_recently_used_first(tmp_path):
+    disk_cache = DiskCache(str(tmp_path), 350)
+    keys = [content_key(i) for i in range(3)]
+    for age, key in enumerate(keys):
+        disk_cache.put(key, 'x' * 100)
+        _set_age(disk_cache, key, 1_000_000 + age)
+    # Oldest entry was read last, so it is now the most recently used
+    _set_age(disk_cache, keys[0], 2_000_000)
+    disk_cache.put(content_key('new'), 'x' * 100)
+    assert disk_cache.get(keys[1]) is None
+    assert disk_cache.get(keys[0]) is not None
+    assert disk_cache.stats()['bytes'] == 300
+
+
+def test_entries_removed_by_another_process_do_not_fail_put(tmp_path, monkeypatch):
+    disk_cache = DiskCache(str(tmp_path), 150)
+    disk_cache.put(content_key(1), 'x' * 100)
+    real_scandir = os.scandir
+
+    def racing_scandir(path):
+        # Another process deletes the files between listing and stat
+        entries = list(real_scandir(path))
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False): os.remove(entry.path)
+        return iter(entries)
+
+    monkeypatch.setattr(cache.os, 'scandir', racing_scandir)
+    disk_cache.put(content_key(2), 'x' * 100) # Must not raise
+    assert disk_cache.stats()['bytes'] == 0
+
+
+def test_shared_directory_is_remeasured(tmp_path, monkeypatch):
+    monkeypatch.setattr(DiskCache, 'resync_interval', 0) # Re-measure on every write
+    first, second = DiskCache(str(tmp_path), 1_000), DiskCache(str(tmp_path), 1_000)
+    for i in range(20):
+        (first if i % 2 else second).put(content_key(i), 'x' * 100)
+    on_disk = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(tmp_path) for name in names)
+    assert on_disk <= 1_000 # Each instance also counts and evicts the other's entries
+    assert first.stats()['bytes'] == on_disk # The last write went through `first`
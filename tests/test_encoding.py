@@ -0,0 +1,80 @@
+# tests/test_encoding.py
+import random
+
+import pytest
+from PIL import Image, ImageDraw
+
+import config
+from analyzer.encoding import encode_page, text_similarity
+
+
+def _noisy_page(width, height, seed=0):
+    """A colourful page that JPEG compresses poorly (worst case for the byte budget)."""
+    return Image.frombytes('RGB', (width, height), random.Random(seed).randbytes(width * height * 3))
+
+
+def _text_page(width=2000, height=1500, box=None):
+    """A white page with black 'text' lines, optionally only inside `box`."""
+    page = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(page)
+    left, top, right, bottom = box or (100, 100, width - 100, height - 100)
+    for y in range(top, bottom, 40): draw.rectangle((left, y, right, y + 12), fill='black')
+    return page
+
+
+@pytest.fixture(autouse=True)
+def adaptive(monkeypatch):
+    monkeypatch.setattr(config, 'ENCODING_MODE', 'adaptive')
+    monkeypatch.setattr(config, 'ENCODE_MAX_LONG_EDGE', 1600)
+    monkeypatch.setattr(config, 'ENCODE_MIN_LONG_EDGE', 900)
+    monkeypatch.setattr(config, 'ENCODE_QUALITY', 85)
+    monkeypatch.setattr(config, 'ENCODE_MIN_QUALITY', 55)
+
+
+def test_page_fits_the_byte_budget(monkeypatch):
+    monkeypatch.setattr(config, 'ENCODE_MAX_BYTES', 300 * 1024)
+    data, mime_type, info = encode_page(_noisy_page(1400, 1000))
+    assert mime_type == 'image/jpeg'
+    assert len(data) == info['bytes'] <= 300 * 1024
+    assert info['mode'] == 'RGB'
+    assert info['quality'] < 85 or info['size'] != (1400, 1000) # Had to give something up to fit
+
+
+def test_long_edge_is_capped(monkeypatch):
+    monkeypatch.setattr(config, 'ENCODE_MAX_BYTES', 10 * 1024 * 1024)
+    _, _, info = encode_page(_text_page(3200, 1800))
+    assert max(info['size']) <= 1600 and info['quality'] == 85
+
+
+def test_resolution_is_not_lowered_past_the_readability_floor(monkeypatch):
+    monkeypatch.setattr(config, 'ENCODE_MAX_BYTES', 1024) # Cannot be met
+    data, _, info = encode_page(_noisy_page(1600, 1200))
+    assert max(info['size']) >= 900
+    assert info['quality'] == 55 and len(data) > 1024 # Best effort rather than an unreadable page
+
+
+def test_colourless_pages_are_sent_as_grayscale(monkeypatch):
+    monkeypatch.setattr(config, 'ENCODE_MAX_BYTES', 400 * 1024)
+    assert encode_page(_text_page())[2]['mode'] == 'L'
+    assert encode_page(_noisy_page(800, 600))[2]['mode'] == 'RGB'
+
+
+def test_blank_margins_are_cropped(monkeypatch):
+    monkeypatch.setattr(config, 'ENCODE_MAX_BYTES', 400 * 1024)
+    monkeypatch.setattr(config, 'ENCODE_CROP_MARGINS', True)
+    _, _, info = encode_page(_text_page(1600, 1200, box=(500, 400, 1100, 800)))
+    assert info['cropped'] and max(info['size']) < 1600
+    _, _, info = encode_page(_text_page(1600, 1200, box=(10, 10, 1590, 1190)))
+    assert not info['cropped'] # Content fills the page
+
+
+def test_legacy_mode_keeps_the_original_encoding(monkeypatch):
+    monkeypatch.setattr(config, 'ENCODING_MODE', 'legacy')
+    _, _, info = encode_page(_text_page(2000, 1500))
+    assert info == {'mode': 'RGB', 'size': (2000, 1500), 'quality': 90, 'cropped': False, 'bytes': info['bytes']}
+
+
+def test_text_similarity_ignores_case_punctuation_and_layout():
+    assert text_similarity('Our Team:\nJane, CEO', 'our team jane ceo') == 1.0
+    assert text_similarity('market size', 'go to market plan') < 1.0
+    assert text_similarity('', '') == 1.0
@@ -0,0 +1,150 @@
+# tests/test_jobs.py
+import os
+import threading
+import time
+
+import pytest
+
+import config
+from analyzer import jobs
+from analyzer.jobs import JobManager, QueueFullError
+
+
+class FakeAnalyzer:
+    """Reports progress and partial results like PitchAnalyzer; 'crash'/'bad' decks raise or fail."""
+    gate = None
+
+    def analyze(self, pdf_path, progress=None, on_event=None):
+        if FakeAnalyzer.gate: FakeAnalyzer.gate.wait(5)
+        name = os.path.basename(pdf_path)
+        if name.startswith('crash'): raise RuntimeError('boom')
+        if name.startswith('bad'): return {'overall_score': 0, 'section_scores': {}, 'feedback': {}, 'error': 'No text content extracted from PDF.'}
+        progress('extracting', pages_total=2, pages_done=2)
+        on_event('sections', {'sections': {'Problem': [1], 'Team': [2]}})
+        progress('scoring', sections_total=2, sections_scored=2)
+        on_event('section_score', {'section': 'Problem', 'score': 80, 'justification': 'Clear.'})
+        on_event('section_score', {'section': 'Team', 'score': 60, 'justification': 'Thin.'})
+        on_event('overall_score', {'overall_score': 70})
+        on_event('feedback', {'strengths': ['Clear problem.'], 'weaknesses': []})
+        return {'overall_score': 70, 'section_scores': {'Problem': {'score': 80, 'justification': 'Clear.'}, 'Team': {'score': 60, 'justification': 'Thin.'}},
+                'feedback': {'strengths': ['Clear problem.'], 'weaknesses': []}, 'error': None}
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    FakeAnalyzer.gate = None
+    monkeypatch.setattr(jobs, 'PitchAnalyzer', FakeAnalyzer)
+    return JobManager(workers=1, max_queue=2)
+
+
+@pytest.fixture
+def upload(tmp_path):
+    def make(name='deck.pdf'):
+        path = tmp_path / name
+        path.write_bytes(b'%PDF')
+        return str(path)
+    return make
+
+
+def wait(manager, job_id):
+    """Blocks until the job finishes and returns its final snapshot."""
+    for _ in manager.iter_events(job_id, heartbeat=0.05): pass
+    return manager.get(job_id)
+
+
+def test_job_runs_in_background_and_reports_progress(manager, upload):
+    pdf_path = upload()
+    job_id = manager.submit(pdf_path, 'deck.pdf')
+    job = wait(manager, job_id)
+    assert job['status'] == 'done' and job['error'] is None
+    assert job['results']['overall_score'] == 70
+    assert job['stage'] == 'scoring'
+    assert job['progress'] == {'pages_total': 2, 'pages_done': 2, 'sections_total': 2, 'sections_scored': 2}
+    assert 'pdf_path' not in job and 'events' not in job
+    deadline = time.monotonic() + 5
+    while os.path.exists(pdf_path) and time.monotonic() < deadline: time.sleep(0.01)
+    assert not os.path.exists(pdf_path) # Upload removed once the job finishes
+
+
+def test_failed_and_crashed_jobs(manager, upload):
+    failed = wait(manager, manager.submit(upload('bad.pdf'), 'bad.pdf'))
+    assert failed['status'] == 'failed' and failed['error'] == 'No text content extracted from PDF.'
+    crashed = wait(manager, manager.submit(upload('crash.pdf'), 'crash.pdf'))
+    assert crashed['status'] == 'failed' and crashed['error'] == 'Unexpected error: boom'
+
+
+def test_queue_is_bounded_and_reports_positions(manager, upload):
+    FakeAnalyzer.gate = threading.Event()
+    running = manager.submit(upload('a.pdf'), 'a.pdf')
+    deadline = time.monotonic() + 5
+    while manager.get(running)['status'] != 'running' and time.monotonic() < deadline: time.sleep(0.01)
+    queued = [manager.submit(upload(f'{name}.pdf'), f'{name}.pdf') for name in ('b', 'c')]
+    assert [manager.get(job_id)['queue_position'] for job_id in queued] == [1, 2]
+    with pytest.raises(QueueFullError): manager.submit(upload('d.pdf'), 'd.pdf')
+    FakeAnalyzer.gate.set()
+    assert [wait(manager, job_id)['status'] for job_id in [running] + queued] == ['done'] * 3
+
+
+def test_finished_jobs_expire(manager, upload, monkeypatch):
+    job_id = manager.submit(upload(), 'deck.pdf')
+    wait(manager, job_id)
+    monkeypatch.setattr(config, 'JOB_RESULT_TTL', 0)
+    time.sleep(0.01)
+    manager.submit(upload('next.pdf'), 'next.pdf') # Pruning happens on submit
+    assert manager.get(job_id) is None
+    assert manager.get('no-such-job') is None
+
+
+def test_events_follow_the_job_in_order(manager, upload):
+    job_id = manager.submit(upload(), 'deck.pdf')
+    events = [event for event in manager.iter_events(job_id, heartbeat=0.05) if event is not None]
+    assert [index for index, _, _ in events] == list(range(len(events)))
+    names = [name for _, name, _ in events]
+    assert names == ['progress', 'sections', 'progress', 'section_score', 'section_score', 'overall_score', 'feedback', 'done']
+    assert events[-1][2] == {'status': 'done', 'error': None, 'overall_score': 70}
+
+
+def test_events_resume_after_the_last_seen_id(manager, upload):
+    job_id = manager.submit(upload(), 'deck.pdf')
+    everything = [event for event in manager.iter_events(job_id, heartbeat=0.05) if event is not None]
+    resumed = list(manager.iter_events(job_id, start=4)) # Client saw ids 0-3 before reconnecting
+    assert resumed == everything[4:]
+    assert list(manager.iter_events(job_id, start=len(everything))) == []
+    assert list(manager.iter_events('no-such-job')) == []
+
+
+def test_heartbeat_while_a_job_is_quiet(manager, upload):
+    FakeAnalyzer.gate = threading.Event()
+    job_id = manager.submit(upload(), 'deck.pdf')
+    events = manager.iter_events(job_id, heartbeat=0.01)
+    assert next(events) is None # Nothing happened within the heartbeat interval
+    FakeAnalyzer.gate.set()
+    assert [event for event in events if event is not None][-1][1] == 'done'
+
+
+def test_stored_results_still_stream_partial_results(monkeypatch, upload, tmp_path):
+    from analyzer.store import ResultStore
+    FakeAnalyzer.gate = None
+    monkeypatch.setattr(jobs, 'PitchAnalyzer', FakeAnalyzer)
+    manager = JobManager(workers=1, max_queue=2, store=ResultStore(str(tmp_path / 'results.db')))
+    wait(manager, manager.submit(upload('first.pdf'), 'first.pdf'))
+    job_id = manager.submit(upload('again.pdf'), 'again.pdf') # Same bytes, served from the store
+    names = [name for _, name, _ in (event for event in manager.iter_events(job_id, heartbeat=0.05) if event is not None)]
+    assert names == ['section_score', 'section_score', 'overall_score', 'feedback', 'done']
+
+
+def test_event_stream_route_honours_last_event_id(manager, upload, monkeypatch):
+    flask = pytest.importorskip('flask')
+    monkeypatch.setattr(config, 'RESULT_STORE_ENABLED', False)
+    from routes import main
+    monkeypatch.setattr(main, 'job_manager', manager)
+    app = flask.Flask(__name__)
+    app.register_blueprint(main.main_bp)
+    client = app.test_client()
+
+    job_id = manager.submit(upload(), 'deck.pdf')
+    wait(manager, job_id)
+    body = client.get(f'/jobs/{job_id}/events', headers={'Last-Event-ID': '5'}).get_data(as_text=True)
+    assert body.startswith('id: 6\nevent: feedback\n')
+    assert body.count('id: ') == 2
+    assert client.get('/jobs/no-such-job/events').status_code == 404
@@ -0,0 +1,115 @@
+# tests/test_ocr.py
+import json
+import threading
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+from PIL import Image
+
+import config
+from analyzer import encoding, raster, ratelimit
+from analyzer.backends import StubBackend
+from analyzer.core import PitchAnalyzer
+
+
+class CountingBackend(StubBackend):
+    """Stub backend that records how many calls overlap and how many images each carried."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self.lock = threading.Lock()
+        self.active = self.peak = 0
+        self.images_per_call = []
+
+    def generate(self, model_name, contents, *args):
+        with self.lock:
+            self.active += 1; self.peak = max(self.peak, self.active)
+            self.images_per_call.append(sum(isinstance(part, dict) for part in contents) if isinstance(contents, list) else 0)
+        try: return self.respond(model_name, contents, *args)
+        finally:
+            with self.lock: self.active -= 1
+
+    def respond(self, model_name, contents, *args):
+        return super().generate(model_name, contents, *args)
+
+
+@pytest.fixture
+def deck(tmp_path, monkeypatch):
+    """Fakes a deck of image-only pages; returns its path and how many decoded pages were alive at once."""
+    path = tmp_path / 'deck.pdf'
+    path.write_bytes(b'%PDF-1.4 image-only deck')
+    state = {'path': str(path), 'pages': 0, 'alive': 0, 'peak_alive': 0}
+    lock = threading.Lock()
+
+    def iter_page_images(pdf_path, pages, **kwargs):
+        for page_num in pages:
+            with lock: state['alive'] += 1; state['peak_alive'] = max(state['peak_alive'], state['alive'])
+            yield page_num, Image.new('RGB', (64, 48), (page_num % 255, 80, 160))
+
+    real_encode = encoding.encode_page
+    def encode_page(image):
+        encoded = real_encode(image)
+        with lock: state['alive'] -= 1
+        return encoded
+
+    monkeypatch.setattr(raster, 'page_count', lambda pdf_path, poppler_path=None: state['pages'])
+    monkeypatch.setattr(raster, 'iter_page_images', iter_page_images)
+    monkeypatch.setattr(encoding, 'encode_page', encode_page)
+    monkeypatch.setattr(config, 'TEXT_LAYER_ENABLED', False)
+    monkeypatch.setattr(config, 'OCR_CACHE_ENABLED', False)
+    monkeypatch.setattr(config, 'LLM_REQUESTS_PER_MINUTE', 0)
+    monkeypatch.setattr(config, 'LLM_TOKENS_PER_MINUTE', 0)
+    monkeypatch.setattr(config, 'LLM_RETRY_DELAY', 0)
+    monkeypatch.setattr(ratelimit, '_limiters', {})
+    return state
+
+
+@pytest.mark.parametrize('batch_size, pages', [(1, 12), (4, 16), (8, 32)])
+def test_slow_ocr_calls_do_not_hold_page_slots(deck, monkeypatch, batch_size, pages):
+    monkeypatch.setattr(config, 'OCR_BATCH_SIZE', batch_size)
+    monkeypatch.setattr(config, 'OCR_CONCURRENCY', 4)
+    monkeypatch.setattr(config, 'RASTER_MAX_INFLIGHT_PAGES', 8)
+    deck['pages'] = pages
+    backend = CountingBackend(latency=0.1)
+    texts = PitchAnalyzer(backend=backend)._extract_text(deck['path'])
+    assert all(texts)
+    assert backend.peak == 4 # Every worker had a request in flight at once
+    assert deck['peak_alive'] <= 8
+
+
+def test_batch_size_is_capped_at_inflight_pages(deck, monkeypatch):
+    monkeypatch.setattr(config, 'OCR_BATCH_SIZE', 16)
+    monkeypatch.setattr(config, 'RASTER_MAX_INFLIGHT_PAGES', 4)
+    deck['pages'] = 10
+    backend = CountingBackend()
+    assert all(PitchAnalyzer(backend=backend)._extract_text(deck['path']))
+    assert max(backend.images_per_call) == 4
+    assert deck['peak_alive'] <= 4
+
+
+def test_failed_batch_request_is_not_split(deck, monkeypatch):
+    class DownBackend(CountingBackend):
+        def respond(self, *args): raise google_exceptions.ServiceUnavailable('Service unavailable.')
+
+    monkeypatch.setattr(config, 'OCR_BATCH_SIZE', 8)
+    deck['pages'] = 8
+    backend = DownBackend()
+    analyzer = PitchAnalyzer(backend=backend)
+    assert analyzer._extract_text(deck['path']) == [''] * 8
+    assert len(backend.images_per_call) == config.LLM_RETRY_ATTEMPTS # One request, retried; never split
+    assert analyzer._degraded == [f'OCR failed for page {n}' for n in range(1, 9)]
+
+
+def test_unmapped_pages_are_split_and_retried(deck, monkeypatch):
+    class PartialBackend(CountingBackend):
+        def respond(self, model_name, contents, *args):
+            images = [part for part in contents if isinstance(part, dict)]
+            if len(images) == 1: return 'single page text'
+            return json.dumps({'pages': [{'image': 1, 'text': 'first page text'}]}) # Drops every other page
+
+    monkeypatch.setattr(config, 'OCR_BATCH_SIZE', 4)
+    deck['pages'] = 4
+    backend = PartialBackend()
+    texts = PitchAnalyzer(backend=backend)._extract_text(deck['path'])
+    assert texts == ['first page text', 'first page text', 'single page text', 'single page text']
+    assert backend.images_per_call == [4, 2, 1, 1] # 4 pages -> pages 2-3 (then 3 alone) and page 4
@@ -0,0 +1,18 @@
+# tests/test_raster.py
+from analyzer.raster import _page_runs
+
+
+def test_consecutive_pages_form_one_run():
+    assert list(_page_runs([1, 2, 3], window=10)) == [(1, 3)]
+
+
+def test_gaps_split_runs():
+    assert list(_page_runs([1, 2, 5, 7, 8], window=10)) == [(1, 2), (5, 5), (7, 8)]
+
+
+def test_runs_are_capped_at_window():
+    assert list(_page_runs(range(1, 11), window=4)) == [(1, 4), (5, 8), (9, 10)]
+
+
+def test_no_pages():
+    assert list(_page_runs([], window=4)) == []
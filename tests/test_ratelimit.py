@@ -0,0 +1,106 @@
+# tests/test_ratelimit.py
+import types
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+import config
+from analyzer import ratelimit
+from analyzer.ratelimit import RateLimiter, retry_after_seconds
+
+
+class FakeClock:
+    """Stands in for time.monotonic/time.sleep: sleeping advances the clock instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(ratelimit, 'time', types.SimpleNamespace(monotonic=fake.monotonic, sleep=fake.sleep))
+    return fake
+
+
+def test_disabled_limiter_does_not_wait(clock):
+    limiter = RateLimiter(0, 0)
+    assert not limiter.enabled
+    assert [limiter.acquire(10 ** 6) for _ in range(100)] == [0.0] * 100
+    assert clock.slept == []
+
+
+def test_pause_is_honoured_when_limiter_disabled(clock):
+    limiter = RateLimiter(0, 0)
+    limiter.pause(2.0)
+    assert limiter.acquire() == pytest.approx(2.0)
+    assert limiter.acquire() == 0.0
+
+
+def test_requests_per_minute_budget(clock):
+    limiter = RateLimiter(60, 0)
+    assert all(limiter.acquire() == 0.0 for _ in range(60)) # Starts with a full minute's allowance
+    assert limiter.acquire() == pytest.approx(1.0) # Then one request per second
+
+
+def test_tokens_per_minute_budget(clock):
+    limiter = RateLimiter(0, 600)
+    assert limiter.acquire(600) == 0.0
+    assert limiter.acquire(100) == pytest.approx(10.0)
+
+
+def test_oversized_request_is_capped_to_the_budget(clock):
+    limiter = RateLimiter(0, 100)
+    assert limiter.acquire(10 ** 6) == 0.0 # Would otherwise never fit
+
+
+def test_pause_empties_request_bucket(clock):
+    limiter = RateLimiter(60, 0)
+    limiter.pause(5.0)
+    # 5s of pause, then a full second for the first request so workers do not burst
+    assert limiter.acquire() == pytest.approx(6.0)
+
+
+def test_retry_after_from_header():
+    error = types.SimpleNamespace(response=types.SimpleNamespace(headers={'Retry-After': '7'}))
+    assert retry_after_seconds(error) == 7.0
+
+
+def test_retry_after_from_grpc_retry_info():
+    error = google_exceptions.ResourceExhausted("Quota exceeded. retry_delay {\n  seconds: 12\n}")
+    assert retry_after_seconds(error) == 12.0
+    assert retry_after_seconds(google_exceptions.ResourceExhausted("Please retry in 3.5s.")) == 3.5
+
+
+def test_retry_after_missing():
+    assert retry_after_seconds(google_exceptions.ResourceExhausted("Quota exceeded")) is None
+
+
+def test_generate_waits_out_429_with_limiter_disabled(clock, monkeypatch):
+    from analyzer.backends import StubBackend
+    from analyzer.core import PitchAnalyzer
+
+    class RateLimitedBackend(StubBackend):
+        calls = 0
+
+        def generate(self, *args):
+            self.calls += 1
+            raise google_exceptions.ResourceExhausted("Please retry in 2s.")
+
+    monkeypatch.setattr(config, 'LLM_REQUESTS_PER_MINUTE', 0)
+    monkeypatch.setattr(config, 'LLM_TOKENS_PER_MINUTE', 0)
+    monkeypatch.setattr(ratelimit, '_limiters', {})
+    backend = RateLimitedBackend()
+    analyzer = PitchAnalyzer(backend=backend)
+    assert analyzer._generate('test-model', ['prompt'], 0.1, 10, None, 0, 'Test') is None
+    assert backend.calls == config.LLM_RETRY_ATTEMPTS
+    # Every retry after a 429 waited for the server's retry hint
+    assert clock.slept == [pytest.approx(2.0)] * (config.LLM_RETRY_ATTEMPTS - 1)
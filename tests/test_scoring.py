@@ -0,0 +1,127 @@
+# tests/test_scoring.py
+import json
+import threading
+
+import pytest
+
+import config
+from analyzer.backends import StubBackend
+from analyzer.core import PitchAnalyzer
+
+SECTION_TEXT = 'A sufficiently long description of this part of the business.'
+
+
+class ScoringBackend(StubBackend):
+    """Stub backend that records the sections named in each scoring call; `broken` sections come back invalid."""
+
+    def __init__(self, broken=()):
+        super().__init__()
+        self.broken = set(broken)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def generate(self, model_name, contents, *args):
+        named = [section for section in config.TARGET_SECTIONS if f'**Section:** {section}\n' in contents]
+        with self.lock: self.calls.append(named)
+        if not named: return super().generate(model_name, contents, *args) # Section identification, feedback
+        if len(named) > 1:
+            return json.dumps({section: {'score': 'n/a'} if section in self.broken else {'score': 60 + i, 'justification': 'Batched.'} for i, section in enumerate(named)})
+        return json.dumps({'score': 50, 'justification': 'Single.'})
+
+
+@pytest.fixture
+def sections(monkeypatch):
+    monkeypatch.setattr(config, 'SCORE_CACHE_ENABLED', False)
+    return {section: f'{section}: {SECTION_TEXT}' for section in config.TARGET_SECTIONS[:4]}
+
+
+def test_batch_mode_scores_all_sections_in_one_call(sections, monkeypatch):
+    monkeypatch.setattr(config, 'SCORING_MODE', 'batch')
+    backend = ScoringBackend()
+    scores = PitchAnalyzer(backend=backend)._score_sections(sections)
+    assert backend.calls == [list(sections)]
+    assert [data['score'] for data in scores.values()] == [60, 61, 62, 63]
+
+
+def test_batch_mode_falls_back_per_section_for_invalid_scores(sections, monkeypatch):
+    monkeypatch.setattr(config, 'SCORING_MODE', 'batch')
+    broken = list(sections)[1:3]
+    backend = ScoringBackend(broken=broken)
+    scores = PitchAnalyzer(backend=backend)._score_sections(sections)
+    assert backend.calls[0] == list(sections)
+    assert sorted(map(tuple, backend.calls[1:])) == sorted((section,) for section in broken)
+    assert list(scores) == list(sections) # Original order despite the fallback
+    assert [scores[section]['justification'] for section in sections] == ['Batched.', 'Single.', 'Single.', 'Batched.']
+
+
+@pytest.mark.parametrize('mode', ['serial', 'parallel'])
+def test_per_section_modes(sections, monkeypatch, mode):
+    monkeypatch.setattr(config, 'SCORING_MODE', mode)
+    backend = ScoringBackend()
+    scores = PitchAnalyzer(backend=backend)._score_sections(sections)
+    assert sorted(map(tuple, backend.calls)) == sorted((section,) for section in sections)
+    assert list(scores) == list(sections)
+    assert all(data == {'score': 50, 'justification': 'Single.'} for data in scores.values())
+
+
+def test_brief_sections_are_not_sent_to_the_model(sections, monkeypatch):
+    monkeypatch.setattr(config, 'SCORING_MODE', 'batch')
+    first = next(iter(sections))
+    sections[first] = 'too short'
+    backend = ScoringBackend()
+    scores = PitchAnalyzer(backend=backend)._score_sections(sections)
+    assert first not in sum(backend.calls, [])
+    assert scores[first] == {'score': 0, 'justification': 'Content missing/brief.'}
+
+
+@pytest.fixture
+def memo(tmp_path, monkeypatch):
+    from analyzer import cache
+    monkeypatch.setattr(config, 'SCORE_CACHE_ENABLED', True)
+    monkeypatch.setattr(config, 'SCORE_CACHE_DIR', str(tmp_path / 'scores'))
+    monkeypatch.setattr(cache, '_caches', {})
+
+
+def _revision(analyzer, monkeypatch, pages):
+    monkeypatch.setattr(analyzer, '_extract_text', lambda pdf_path: pages)
+    return analyzer.analyze('deck.pdf')
+
+
+def test_unchanged_sections_reuse_memoized_scores(memo, monkeypatch):
+    monkeypatch.setattr(config, 'SECTION_ID_MODE', 'llm')
+    monkeypatch.setattr(config, 'SCORING_MODE', 'parallel')
+    pages = [f'{section} slide. {SECTION_TEXT}' for section in config.TARGET_SECTIONS]
+    backend = ScoringBackend()
+    analyzer = PitchAnalyzer(backend=backend)
+
+    first = _revision(analyzer, monkeypatch, pages)
+    assert first['reused'] == {'sections': [], 'feedback': False}
+    scoring_calls = len([named for named in backend.calls if named])
+
+    backend.calls = []
+    again = _revision(analyzer, monkeypatch, pages)
+    assert sorted(again['reused']['sections']) == sorted(first['section_scores'])
+    assert again['reused']['feedback'] is True
+    assert [named for named in backend.calls if named] == [] # Only section identification was called
+    assert again['section_scores'] == first['section_scores'] and again['feedback'] == first['feedback']
+
+    backend.calls = []
+    revised = list(pages)
+    revised[0] = f'{config.TARGET_SECTIONS[0]} slide. A rewritten, much sharper version of this section.'
+    changed = _revision(analyzer, monkeypatch, revised)
+    assert [named for named in backend.calls if named] == [[config.TARGET_SECTIONS[0]]]
+    assert config.TARGET_SECTIONS[0] not in changed['reused']['sections']
+    assert len(changed['reused']['sections']) == scoring_calls - 1
+
+
+def test_failed_scores_are_not_memoized(memo, monkeypatch):
+    monkeypatch.setattr(config, 'SCORING_MODE', 'serial')
+    section = config.TARGET_SECTIONS[0]
+    down = ScoringBackend()
+    down.generate = lambda *args: None
+    assert PitchAnalyzer(backend=down)._score_sections({section: SECTION_TEXT})[section]['score'] == 0
+
+    backend = ScoringBackend()
+    analyzer = PitchAnalyzer(backend=backend)
+    assert analyzer._score_sections({section: SECTION_TEXT})[section]['score'] == 50
+    assert backend.calls == [[section]] and analyzer._reused['sections'] == []
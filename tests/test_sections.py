@@ -0,0 +1,57 @@
+# tests/test_sections.py
+import pytest
+
+import config
+from analyzer.sections import SectionClassifier, merge_section_maps
+
+SECTIONS = ['Problem', 'Solution', 'Team']
+KEYWORDS = {
+    'Problem': ['problem', 'pain point', 'struggle', 'expensive'],
+    'Solution': ['solution', 'platform', 'how it works', 'easy'],
+    'Team': ['team', 'founder', 'ceo', 'cto'],
+}
+
+
+@pytest.fixture
+def classifier(monkeypatch):
+    monkeypatch.setattr(config, 'SECTION_CLASSIFIER_MIN_SCORE', 0.15)
+    monkeypatch.setattr(config, 'SECTION_CLASSIFIER_MIN_MARGIN', 0.03)
+    monkeypatch.setattr(config, 'SECTION_CLASSIFIER_MULTI_RATIO', 0.85)
+    monkeypatch.setattr(config, 'SECTION_CLASSIFIER_TITLE_WORDS', 4)
+    monkeypatch.setattr(config, 'SECTION_CLASSIFIER_TITLE_WEIGHT', 3)
+    return SectionClassifier(SECTIONS, KEYWORDS)
+
+
+def test_clear_pages_are_assigned(classifier):
+    pages = ['Problem\nCustomers struggle, it is expensive', 'Our solution\nA platform, here is how it works', 'Team\nJane, founder and CEO']
+    section_map, uncertain, guesses = classifier.classify(pages)
+    assert section_map == {'Problem': [0], 'Solution': [1], 'Team': [2]}
+    assert uncertain == [] and guesses == {}
+
+
+def test_pages_without_keywords_are_left_unassigned(classifier):
+    section_map, uncertain, guesses = classifier.classify(['Acme Inc.', '', 'Thank you'])
+    assert section_map == {} and uncertain == [] and guesses == {}
+
+
+def test_tied_page_is_uncertain_with_a_guess(classifier):
+    section_map, uncertain, guesses = classifier.classify(['Problem and solution\nstruggle expensive platform easy'])
+    assert section_map == {}
+    assert uncertain == [0]
+    assert guesses[0] in ('Problem', 'Solution')
+
+
+def test_title_words_outweigh_body_words(classifier):
+    scores = classifier.score(['Team\nthe platform is easy', 'Notes\nthe platform is easy, team'])
+    assert scores[0, SECTIONS.index('Team')] > scores[1, SECTIONS.index('Team')]
+
+
+def test_close_runner_up_is_also_assigned(classifier, monkeypatch):
+    page = 'Overview\nproblem struggle expensive pain point, solution platform easy'
+    assert classifier.classify([page])[0] == {'Problem': [0]}
+    monkeypatch.setattr(config, 'SECTION_CLASSIFIER_MULTI_RATIO', 0.7)
+    assert classifier.classify([page])[0] == {'Problem': [0], 'Solution': [0]}
+
+
+def test_merge_section_maps():
+    assert merge_section_maps({'Problem': [2, 0]}, {'Problem': [0, 1], 'Team': [3]}, {'Solution': []}) == {'Problem': [0, 1, 2], 'Team': [3]}
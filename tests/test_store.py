@@ -0,0 +1,138 @@
+# tests/test_store.py
+import threading
+import time
+
+import pytest
+
+import config
+from analyzer.metrics import RESULT_STORE_EVENTS
+from analyzer.store import ResultStore
+
+
+def _coalesced():
+    return RESULT_STORE_EVENTS._values.get(('coalesced',), 0)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / 'results.db'))
+
+
+@pytest.fixture
+def deck(tmp_path):
+    path = tmp_path / 'deck.pdf'
+    path.write_bytes(b'%PDF-1.4 test deck')
+    return str(path)
+
+
+def test_concurrent_requests_for_one_deck_run_once(store, deck):
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def run(pdf_path):
+        calls.append(pdf_path); started.set()
+        release.wait(5)
+        return {'overall_score': 7, 'error': None}
+
+    results = [None] * 4
+    def request(i): results[i] = store.analyze(deck, 'deck.pdf', run)
+
+    coalesced_before = _coalesced()
+    threads = [threading.Thread(target=request, args=(0,))]
+    threads[0].start()
+    assert started.wait(5)
+    threads += [threading.Thread(target=request, args=(i,)) for i in range(1, 4)]
+    for thread in threads[1:]: thread.start()
+    deadline = time.monotonic() + 5
+    while _coalesced() - coalesced_before < 3 and time.monotonic() < deadline: time.sleep(0.01)
+    release.set()
+    for thread in threads: thread.join(5)
+
+    assert calls == [deck]
+    assert _coalesced() - coalesced_before == 3
+    assert {result['overall_score'] for result in results} == {7}
+    assert len({result['stored']['id'] for result in results}) == 1
+
+
+def test_stored_result_is_served_without_running(store, deck):
+    first = store.analyze(deck, 'deck.pdf', lambda path: {'overall_score': 5, 'error': None})
+    again = store.analyze(deck, 'copy.pdf', lambda path: pytest.fail('should be served from the store'))
+    assert again['overall_score'] == 5
+    assert again['stored']['id'] == first['stored']['id']
+
+
+def test_failed_analysis_is_not_stored(store, deck):
+    failed = store.analyze(deck, 'deck.pdf', lambda path: {'overall_score': 0, 'error': 'OCR failed'})
+    assert 'stored' not in failed
+    assert store.search() == []
+
+
+def test_owner_error_reaches_waiting_requests(store, deck):
+    started, release = threading.Event(), threading.Event()
+
+    def run(pdf_path):
+        started.set(); release.wait(5)
+        raise RuntimeError('pipeline crashed')
+
+    errors = []
+    def request():
+        try: store.analyze(deck, 'deck.pdf', run)
+        except RuntimeError as e: errors.append(str(e))
+
+    owner = threading.Thread(target=request); owner.start()
+    assert started.wait(5)
+    coalesced_before = _coalesced()
+    waiter = threading.Thread(target=request); waiter.start()
+    deadline = time.monotonic() + 5
+    while _coalesced() == coalesced_before and time.monotonic() < deadline: time.sleep(0.01)
+    release.set()
+    owner.join(5); waiter.join(5)
+    assert errors == ['pipeline crashed'] * 2
+
+
+def test_changed_settings_miss_the_stored_result(store, deck, monkeypatch):
+    store.analyze(deck, 'deck.pdf', lambda path: {'overall_score': 5, 'error': None})
+    monkeypatch.setattr(config, 'SECTION_ID_MODE', 'llm' if config.SECTION_ID_MODE != 'llm' else 'local')
+    rerun = store.analyze(deck, 'deck.pdf', lambda path: {'overall_score': 8, 'error': None})
+    assert rerun['overall_score'] == 8
+    assert len(store.search()) == 2
+
+
+def test_search_filters(store, tmp_path, monkeypatch):
+    for name, score in (('alpha.pdf', 3), ('beta.pdf', 6), ('alphabet.pdf', 9)):
+        path = tmp_path / name
+        path.write_bytes(name.encode())
+        store.analyze(str(path), name, lambda pdf_path, score=score: {'overall_score': score, 'error': None})
+    assert [row['filename'] for row in store.search(deck='alpha')] == ['alphabet.pdf', 'alpha.pdf']
+    assert [row['filename'] for row in store.search(min_score=4, max_score=8)] == ['beta.pdf']
+    assert len(store.search(limit=1)) == 1
+    monkeypatch.setattr(config, 'RESULT_STORE_QUERY_LIMIT', 2)
+    assert len(store.search(limit=100)) == 2
+
+
+def test_degraded_analysis_is_not_stored(store, deck, monkeypatch):
+    from analyzer.backends import StubBackend
+    from analyzer.core import PitchAnalyzer
+
+    class FlakyTextBackend(StubBackend):
+        down = True
+
+        def generate(self, model_name, contents, *args):
+            if self.down and 'Map content to sections' not in str(contents): return None # Scoring and feedback calls fail
+            return super().generate(model_name, contents, *args)
+
+    monkeypatch.setattr(config, 'SCORE_CACHE_ENABLED', False)
+    monkeypatch.setattr(config, 'SECTION_ID_MODE', 'llm')
+    backend = FlakyTextBackend()
+    analyzer = PitchAnalyzer(backend=backend)
+    pages = [f'{section} slide\n' + 'Details about this part of the business. ' * 5 for section in config.TARGET_SECTIONS]
+    monkeypatch.setattr(analyzer, '_extract_text', lambda pdf_path: pages)
+
+    outage = store.analyze(deck, 'deck.pdf', analyzer.analyze)
+    assert outage['error'] is None and outage['overall_score'] == 0
+    assert 'Feedback generation failed' in outage['degraded']
+    assert 'stored' not in outage and store.search() == []
+
+    backend.down = False
+    healthy = store.analyze(deck, 'deck.pdf', analyzer.analyze)
+    assert healthy['degraded'] == [] and healthy['overall_score'] == 70
+    assert store.lookup(healthy['stored']['pdf_hash'])['overall_score'] == 70
@@ -0,0 +1,30 @@
+# tests/test_timing.py
+import subprocess
+import sys
+
+import pytest
+
+from analyzer import timing
+from analyzer.timing import StageTimer
+
+BUSY_CHILD = [sys.executable, '-c', 'sum(range(5 * 10 ** 6))']
+
+
+def test_stages_accumulate_calls_and_counters():
+    timer = StageTimer()
+    for _ in range(3):
+        with timer.stage('encode'): pass
+    timer.add('bytes_sent', 100); timer.add('bytes_sent', 50); timer.add('model_calls')
+    snapshot = timer.snapshot()
+    assert snapshot['stages']['encode']['calls'] == 3
+    assert snapshot['counters'] == {'bytes_sent': 150, 'model_calls': 1}
+
+
+@pytest.mark.skipif(timing.resource is None, reason="child CPU time is not reported on this platform")
+def test_child_process_cpu_is_counted_only_when_asked():
+    timer = StageTimer()
+    with timer.stage('rasterize', children=True): subprocess.run(BUSY_CHILD, check=True)
+    with timer.stage('ocr'): subprocess.run(BUSY_CHILD, check=True)
+    stages = timer.snapshot()['stages']
+    assert stages['rasterize']['cpu_s'] > 0.05
+    assert stages['ocr']['cpu_s'] < stages['rasterize']['cpu_s'] / 2